@@ -726,7 +726,8 @@ elif st.session_state.current_page == "Classification":
     # 3D Visualization section
     st.markdown("## 🌌 3D Visualization & Simulation")
     
-    if submitted and os.path.exists("Index.html"):
+    simulation_html = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulation", "index.html")
+    if submitted and os.path.exists(simulation_html):
         # Prepare parameters to send to simulation
         params = {
             "orbitDistance": float(orbit_distance),
@@ -740,7 +741,7 @@ elif st.session_state.current_page == "Classification":
             "transitDepth": float(transit_depth)
         }
         
-        with open("Index.html", "r", encoding="utf-8") as f:
+        with open(simulation_html, "r", encoding="utf-8") as f:
             sim_html = f.read()
         
         # Directly replace the default exoParams in the HTML with actual params
@@ -754,10 +755,10 @@ elif st.session_state.current_page == "Classification":
                 sim_html = sim_html[:start_index] + f"let exoParams = {params_js};" + sim_html[end_index:]
         
         components.html(sim_html, height=800, scrolling=False)
-    elif os.path.exists("Index.html"):
+    elif os.path.exists(simulation_html):
         st.info("👆 Submit the classification form to view the 3D simulation with your parameters")
     else:
-        st.info("3D visualization file (Index.html) not found")
+        st.info("3D visualization file (simulation/index.html) not found")
     
     st.markdown("---")
     
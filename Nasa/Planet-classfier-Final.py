@@ -1,10 +1,17 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import json
 import pandas as pd
 import numpy as np
-import pickle
 import os
+import io
+import artifacts
+import datasets
+import features
+import lightcurve
+import scoring
+import training
+from cache import LRUCache
+from registry import WATCH_INTERVAL, ModelRegistry
 
 # Page configuration
 st.set_page_config(
@@ -18,47 +25,233 @@ st.set_page_config(
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 'Home'
 
-# Load models and preprocessors
+# Model registry: each pipeline is loaded on first use and cached per process.
+# Newer bundles are swapped in without a restart; 0 disables the polling.
+MODEL_WATCH_INTERVAL = float(os.environ.get("EXOCLASSIFY_MODEL_WATCH_INTERVAL", WATCH_INTERVAL))
+
+@st.cache_resource
+def get_model_registry():
+    """Shared registry of the binary and multi-class pipelines"""
+    model_registry = ModelRegistry()
+    if MODEL_WATCH_INTERVAL > 0:
+        model_registry.watch(MODEL_WATCH_INTERVAL)
+    return model_registry
+
+def load_scoring_pipeline(name):
+    """Pipeline ('binary' or 'multiclass'), or None if it failed to load"""
+    return get_model_registry().get(name)
+
+# 3D simulation: a static component the browser loads once; every rerun
+# posts the current parameters to the running page (see simulation/index.html)
+SIMULATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulation")
+exoplanet_simulation = components.declare_component("exoplanet_simulation", path=SIMULATION_DIR)
+
+# Rendering quality: 'auto' adapts to the CPU time a frame takes (budget in
+# ms); 'high', 'medium', 'low' or 'minimal' pins a tier
+SIMULATION_QUALITY = os.environ.get("EXOCLASSIFY_SIMULATION_QUALITY", "auto")
+SIMULATION_FRAME_BUDGET_MS = float(os.environ.get("EXOCLASSIFY_SIMULATION_FRAME_BUDGET_MS", 12))
+
+# Rows scored per step in bulk mode; also the progress bar granularity
+BULK_CHUNK_SIZE = 10000
+
+# Research page training data: one parse per CSV version, shared by sessions
+@st.cache_data(show_spinner=False)
+def get_training_data(path, modified=None):
+    """(X, y, classes) for a KOI CSV; ``modified`` invalidates the entry"""
+    return datasets.load_training_data(path)
+
+@st.cache_data(show_spinner=False)
+def get_cv_folds(path, modified=None):
+    """Directory of the precomputed, scaled cross-validation folds"""
+    return datasets.load_cv_folds(path)
+
+# Background training shared by all sessions; fits run in separate processes
 @st.cache_resource
-def load_models():
-    """Load all models and preprocessors directly from /Nasa folder"""
-    models = {}
+def get_training_jobs():
+    """Process pool running Research page training jobs"""
+    return training.TrainingJobs()
+
+def submit_training_job(algorithm, params):
+    """Queue a training run for this session and show its progress"""
+    data_path = datasets.KOI_DATASET
+    if not os.path.exists(data_path):
+        st.error(f"Dataset not found: {data_path}")
+        return
+    package = training.missing_package(algorithm)
+    if package:
+        st.error(f"{algorithm} needs the {package} package: pip install {package}")
+        return
+    if st.session_state.get('cv_mode'):
+        folds_dir = get_cv_folds(data_path, os.path.getmtime(data_path))
+        st.session_state.cv_job = get_training_jobs().submit_cross_validation(algorithm, params, folds_dir)
+    else:
+        X, y, classes = get_training_data(data_path, os.path.getmtime(data_path))
+        st.session_state.training_job = get_training_jobs().submit(algorithm, params, X, y, classes)
+    st.session_state.training_complete = False
+    st.rerun()
+
+@st.fragment(run_every=1.0)
+def training_job_progress(job_id):
+    """Poll a training job; hands the result to the results panel when done"""
+    status = get_training_jobs().status(job_id)
+    if status is None or status['state'] == "failed":
+        st.error(f"Training failed: {status['error'] if status else 'job not found'}")
+        if st.button("Dismiss", key="dismiss_training_job"):
+            del st.session_state.training_job
+            st.rerun()
+        return
+    if status['state'] == "done":
+        st.session_state.training_results = status['result']
+        st.session_state.training_complete = True
+        del st.session_state.training_job
+        st.rerun()
+
+    progress = status['progress']
+    if progress is None:
+        waiting = len(get_training_jobs().active())
+        st.info(f"⏳ {status['algorithm']} job queued ({waiting} job(s) queued or running)")
+        return
+    metric = ", ".join(f"{name}: {value:.4f}" for name, value in progress['metric'].items())
+    st.progress(
+        progress['done'] / max(progress['total'], 1),
+        text=f"🌲 {status['algorithm']}: {progress['done']}/{progress['total']} trees · "
+             f"{progress['elapsed']:.0f} s" + (f" · {metric}" if metric else ""),
+    )
+    st.caption("Training runs in the background; you can keep using the app.")
+
+@st.fragment(run_every=1.0)
+def cv_progress(cv_id):
+    """Poll the folds of a cross-validation run; shows the combined result when done"""
+    statuses, result = get_training_jobs().cross_validation_status(cv_id)
+    failed = [status for status in statuses if status['state'] == "failed"]
+    if not statuses or failed:
+        st.error(f"Cross-validation failed: {failed[0]['error'] if failed else 'job not found'}")
+        if st.button("Dismiss", key="dismiss_cv_job"):
+            del st.session_state.cv_job
+            st.rerun()
+        return
+    if result is not None:
+        st.session_state.training_results = result
+        st.session_state.training_complete = True
+        del st.session_state.cv_job
+        st.rerun()
+
+    done = sum((status['progress'] or {}).get('done', 0) for status in statuses)
+    total = sum((status['progress'] or {}).get('total', 0) for status in statuses)
+    n_finished = sum(status['state'] == "done" for status in statuses)
+    st.progress(
+        done / max(total, 1),
+        text=f"📐 {statuses[0]['algorithm']}: {n_finished}/{len(statuses)} folds finished",
+    )
+    st.caption("Folds train in parallel in the background; you can keep using the app.")
+
+def submit_sweep_job(algorithm, grid):
+    """Queue a hyperparameter sweep for this session and show its leaderboard"""
+    data_path = datasets.KOI_DATASET
+    if not os.path.exists(data_path):
+        st.error(f"Dataset not found: {data_path}")
+        return
+    if not all(grid.values()):
+        st.error("Every sweep parameter needs at least one value")
+        return
+    package = training.missing_package(algorithm)
+    if package:
+        st.error(f"{algorithm} needs the {package} package: pip install {package}")
+        return
+    X, y, classes = get_training_data(data_path, os.path.getmtime(data_path))
+    st.session_state.sweep_job = get_training_jobs().submit_sweep(algorithm, grid, X, y, classes)
+    st.session_state.training_complete = False
+    st.rerun()
+
+# Research page sweep fields per algorithm: parameter -> (label, default values)
+SWEEP_GRIDS = {
+    "Random Forest": {
+        'n_estimators': ("Number of Trees (n_estimators)", "100, 300, 500"),
+        'max_depth': ("Maximum Depth (max_depth)", "4, 8, 16"),
+        'min_samples_leaf': ("Min Samples Leaf", "1, 4"),
+        'max_features': ("Max Features", "sqrt, log2"),
+    },
+    "XGBoost": {
+        'n_estimators': ("Number of Estimators", "300, 600"),
+        'max_depth': ("Max Depth", "4, 6, 8"),
+        'learning_rate': ("Learning Rate", "0.05, 0.1, 0.2"),
+        'subsample': ("Subsample", "0.8, 1.0"),
+    },
+    "LightGBM": {
+        'n_estimators': ("Number of Estimators", "300, 600"),
+        'num_leaves': ("Number of Leaves", "15, 31, 63"),
+        'learning_rate': ("Learning Rate", "0.05, 0.1"),
+        'subsample': ("Subsample", "0.8, 1.0"),
+    },
+    "CatBoost": {
+        'n_estimators': ("Iterations", "300, 600"),
+        'depth': ("Depth", "4, 6, 8"),
+        'learning_rate': ("Learning Rate", "0.05, 0.1"),
+        'l2_leaf_reg': ("L2 Leaf Regularization", "1, 3"),
+    },
+    "AdaBoost": {
+        'n_estimators': ("Number of Estimators", "100, 300, 500"),
+        'learning_rate': ("Learning Rate", "0.1, 0.5, 1.0"),
+    },
+    "Gradient Boosting": {
+        'n_estimators': ("Number of Estimators", "200, 500"),
+        'max_depth': ("Max Depth", "3, 5, 8"),
+        'learning_rate': ("Learning Rate", "0.05, 0.1, 0.2"),
+        'max_features': ("Feature Fraction (max_features)", "0.8, 1.0"),
+    },
+}
+
+def show_leaderboard(rows):
+    """Sweep trials as a table and an accuracy vs training time chart"""
+    leaderboard = pd.DataFrame(rows).drop(columns=['job_id'])
+    st.dataframe(leaderboard, use_container_width=True, hide_index=True)
+    scored = leaderboard.dropna(subset=['accuracy', 'training_time'])
+    if len(scored) > 1:
+        st.scatter_chart(scored, x='training_time', y='accuracy', color='state')
+
+@st.fragment(run_every=1.0)
+def sweep_progress(sweep_id):
+    """Poll a sweep; when it is finished the best trial becomes the result"""
+    jobs = get_training_jobs()
+    finished, rows = jobs.sweep_status(sweep_id)
+    if finished:
+        best = next((row for row in rows if row['state'] == "done"), None)
+        st.session_state.sweep_leaderboard = rows
+        if best is not None:
+            st.session_state.training_results = jobs.status(best['job_id'])['result']
+            st.session_state.training_complete = True
+        del st.session_state.sweep_job
+        st.rerun()
     
-    # Get directory of the current file (/Nasa)
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-
-    # Debug info (helps you confirm file visibility in Streamlit Cloud)
-   
-
-    try:
-        # Binary classification models
-        with open(os.path.join(base_dir, "binary_model.pkl"), "rb") as f:
-            models['binary_model'] = pickle.load(f)
-        with open(os.path.join(base_dir, "scaler_binary.pkl"), "rb") as f:
-            models['scaler_binary'] = pickle.load(f)
-        with open(os.path.join(base_dir, "poly_transformer_binary.pkl"), "rb") as f:
-            models['poly_binary'] = pickle.load(f)
-
-        # Multi-class classification models
-        with open(os.path.join(base_dir, "multiclass_model.pkl"), "rb") as f:
-            models['multiclass_model'] = pickle.load(f)
-        with open(os.path.join(base_dir, "scaler_multiclass.pkl"), "rb") as f:
-            models['scaler_multiclass'] = pickle.load(f)
-        with open(os.path.join(base_dir, "poly_transformer_multiclass.pkl"), "rb") as f:
-            models['poly_multiclass'] = pickle.load(f)
-        with open(os.path.join(base_dir, "label_encoder_multiclass.pkl"), "rb") as f:
-            models['label_encoder'] = pickle.load(f)
-
-        models['loaded'] = True
-        st.success("✅ All models successfully loaded from /Nasa!")
-
-    except Exception as e:
-        st.error(f"❌ Error loading models: {e}")
-        models['loaded'] = False
-
-    return models
-
-models = load_models()
+    n_finished = sum(row['state'] in ("done", "pruned", "failed") for row in rows)
+    st.progress(n_finished / len(rows), text=f"🔁 Sweep: {n_finished}/{len(rows)} trials finished")
+    show_leaderboard(rows)
+
+# Single-object predictions kept in memory, shared by all sessions
+PREDICTION_CACHE_SIZE = int(os.environ.get("EXOCLASSIFY_PREDICTION_CACHE_SIZE", 256))
+
+@st.cache_resource
+def get_prediction_cache():
+    """LRU cache of single-object predictions"""
+    return LRUCache(PREDICTION_CACHE_SIZE)
+
+def classify_koi(pipeline, koi_values):
+    """Input matrix and Prediction for one KOI given as a dict of raw columns.
+
+    Memoized on the pipeline version and the raw inputs the pipeline depends
+    on, so re-submitting with only visualization inputs changed skips the
+    feature computation and the model.
+    """
+    relevant = features.required_inputs(pipeline.input_features)
+    key = (pipeline.name, pipeline.version,
+           tuple(sorted((k, float(v)) for k, v in koi_values.items() if k in relevant)))
+
+    def compute():
+        koi_row = features.add_derived_features(pd.DataFrame([koi_values]), pipeline.input_features)
+        features_in, _ = scoring.build_feature_matrix(pipeline, koi_row)
+        return features_in, pipeline.predict(features_in)
+
+    return get_prediction_cache().get_or_compute(key, compute)
 # Custom CSS with Teal/Cyan Theme
 st.markdown("""
 <style>
@@ -409,441 +602,551 @@ elif st.session_state.current_page == "Classification":
     )
     
     is_binary = "Binary" in classification_type
+    pipeline_name = "binary" if is_binary else "multiclass"
     
-    st.markdown("---")
+    input_mode = st.radio(
+        "Input Mode",
+        ["Single Object", "Bulk Upload (CSV / Parquet)"],
+        horizontal=True,
+        key="input_mode_selector"
+    )
     
-    # Create two main columns
-    col_input, col_output = st.columns([1, 1])
+    st.markdown("---")
     
-    with col_input:
-        st.markdown("### 📥 Input Parameters")
+    bulk_mode = input_mode.startswith("Bulk")
+    if bulk_mode:
+        st.markdown("### 📂 Bulk Classification")
+        st.write("Upload a cumulative KOI table; rows are scored in chunks of "
+                 f"{BULK_CHUNK_SIZE:,} and the results can be downloaded as CSV.")
         
-        with st.form("classification_form"):
-            st.markdown("#### 🚩 Binary Flags")
-            col1, col2 = st.columns(2)
-            with col1:
-                koi_fpflag_ss = st.selectbox(
-                    "Stellar Eclipse Flag",
-                    [0, 1],
-                    help="Is there a stellar eclipse? (0=No, 1=Yes)"
-                )
-            with col2:
-                koi_fpflag_co = st.selectbox(
-                    "Centroid Offset Flag",
-                    [0, 1],
-                    help="Is signal from nearby star? (0=No, 1=Yes)"
-                )
-            
-            st.markdown("#### 📐 Angular Offsets (arcseconds)")
-            col1, col2 = st.columns(2)
-            with col1:
-                koi_dikco_msky = st.number_input(
-                    "PRF Offset from KIC",
-                    min_value=0.0,
-                    max_value=20.0,
-                    value=0.5,
-                    step=0.1,
-                    help="Angular offset from catalog position"
-                )
-            with col2:
-                koi_dicco_msky = st.number_input(
-                    "PRF Offset OOT",
-                    min_value=0.0,
-                    max_value=20.0,
-                    value=0.3,
-                    step=0.1,
-                    help="Angular offset between images"
-                )
-            
-            st.markdown("#### ⭐ Stellar & System Properties")
-            col1, col2 = st.columns(2)
-            with col1:
-                koi_smet_err2 = st.number_input(
-                    "Stellar Metallicity Error",
-                    min_value=-1.0,
-                    max_value=0.0,
-                    value=-0.05,
-                    step=0.01,
-                    help="Negative error bound for metallicity"
-                )
-            with col2:
-                koi_count = st.number_input(
-                    "Number of Planets",
-                    min_value=1,
-                    max_value=10,
-                    value=1,
-                    step=1,
-                    help="Number of planets in the system"
-                )
+        uploaded_file = st.file_uploader("KOI table", type=["csv", "parquet"])
+        add_light_curves = st.checkbox(
+            "Add transit light-curve summaries",
+            help="Limb-darkened transit depth, duration and ingress time per row (lc_* columns)"
+        )
+        
+        if uploaded_file is not None and st.button("🚀 Classify Table", use_container_width=True):
+            try:
+                pipeline = load_scoring_pipeline(pipeline_name)
+                if pipeline is None:
+                    raise RuntimeError(get_model_registry().status()[pipeline_name]['error'])
+                
+                # Total rows for the progress bar, without parsing the file
+                if scoring.is_parquet(uploaded_file):
+                    import pyarrow.parquet as pq
+                    total_rows = pq.ParquetFile(uploaded_file).metadata.num_rows
+                else:
+                    total_rows = max(scoring.count_csv_rows(uploaded_file.getvalue()), 1)
+                uploaded_file.seek(0)
+                
+                progress = st.progress(0.0)
+                status = st.empty()
+                parts = []
+                stats = {}
+                chunks = scoring.read_table_chunks(uploaded_file, BULK_CHUNK_SIZE)
+                for results, stats in scoring.iter_score(pipeline, chunks, add_light_curves):
+                    parts.append(results)
+                    progress.progress(min(stats['rows'] / total_rows, 1.0))
+                    status.write(f"Scored {stats['rows']:,} rows "
+                                 f"({stats['rows_per_sec']:,.0f} rows/sec)")
+                progress.progress(1.0)
+                
+                st.session_state.bulk_results = pd.concat(parts) if parts else pd.DataFrame()
+                st.session_state.bulk_stats = stats
+                st.session_state.bulk_source = uploaded_file.name
             
-            st.markdown("#### 🌟 Star Properties")
-            col1, col2 = st.columns(2)
-            with col1:
-                star_temp = st.number_input(
-                    "Star Temperature (K)",
-                    min_value=2000,
-                    max_value=40000,
-                    value=5778,
-                    step=100,
-                    help="Surface temperature of host star"
-                )
-            with col2:
-                star_radius = st.number_input(
-                    "Star Radius (Solar radii)",
-                    min_value=0.1,
-                    max_value=20.0,
-                    value=1.0,
-                    step=0.1,
-                    help="Size relative to our Sun"
-                )
+            except Exception as e:
+                st.error(f"Error during bulk classification: {str(e)}")
+                st.exception(e)
+        
+        if st.session_state.get('bulk_results') is not None:
+            results = st.session_state.bulk_results
+            stats = st.session_state.bulk_stats
             
-            st.markdown("#### 🪐 Planet Properties")
             col1, col2, col3 = st.columns(3)
             with col1:
-                koi_prad = st.number_input(
-                    "Planet Radius (Earth radii)",
-                    min_value=0.1,
-                    max_value=30.0,
-                    value=1.0,
-                    step=0.1,
-                    help="Size relative to Earth"
-                )
+                st.metric("Rows Scored", f"{stats.get('rows', 0):,}")
             with col2:
-                koi_teq = st.number_input(
-                    "Equilibrium Temp (K)",
-                    min_value=100,
-                    max_value=3000,
-                    value=288,
-                    step=10,
-                    help="Planet temperature"
-                )
+                st.metric("Throughput", f"{stats.get('rows_per_sec', 0):,.0f} rows/s")
             with col3:
-                koi_model_snr = st.number_input(
-                    "Signal-to-Noise Ratio",
-                    min_value=0.0,
-                    max_value=500.0,
-                    value=50.0,
-                    step=1.0,
-                    help="Transit signal strength"
-                )
+                st.metric("Model Time", f"{stats.get('seconds', 0):.2f} s")
             
-            st.markdown("#### 🔄 Orbital Parameters")
-            col1, col2 = st.columns(2)
-            with col1:
-                orbital_period = st.number_input(
-                    "Orbital Period (days)",
-                    min_value=0.1,
-                    max_value=10000.0,
-                    value=365.25,
-                    step=1.0,
-                    help="Time for one complete orbit"
-                )
-            with col2:
-                orbit_distance = st.number_input(
-                    "Orbital Distance (AU)",
-                    min_value=0.01,
-                    max_value=100.0,
-                    value=1.0,
-                    step=0.01,
-                    help="Distance from star (1 AU = Earth-Sun distance)"
-                )
+            if stats.get('missing_columns'):
+                st.warning("⚠️ Columns missing from the upload were imputed with the training mean: "
+                           + ", ".join(stats['missing_columns']))
             
-            impact_param = st.slider(
-                "Impact Parameter",
-                min_value=0.0,
-                max_value=1.0,
-                value=0.5,
-                step=0.01,
-                help="How centered the transit is (0=center, 1=edge)"
-            )
+            if 'predicted_class' in results:
+                st.markdown("#### Predicted Class Counts")
+                st.bar_chart(results['predicted_class'].value_counts())
+            st.dataframe(results.head(1000), use_container_width=True)
             
-            submitted = st.form_submit_button("🚀 Classify Planet", use_container_width=True)
-    
-    with col_output:
-        st.markdown("### 📊 Classification Results")
+            buffer = io.StringIO()
+            results.to_csv(buffer, index=False)
+            st.download_button(
+                "⬇️ Download Results (CSV)",
+                buffer.getvalue(),
+                file_name=os.path.splitext(st.session_state.bulk_source)[0] + "_classified.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
         
-        if submitted:
-            # Calculate derived features
-            earth_similarity = 1 / (1 + abs(koi_prad - 1) + abs(koi_teq - 288)/100)
-            log_snr = np.log1p(koi_model_snr)
-            
-            # Calculate transit depth (in ppm)
-            transit_depth = ((koi_prad * 6371) / (star_radius * 696000)) ** 2 * 1e6
-            
-            # Calculate insolation (relative to Earth)
-            insolation = (star_temp / 5778) ** 4 * (star_radius ** 2) / (orbit_distance ** 2)
+    else:
+        # Create two main columns
+        col_input, col_output = st.columns([1, 1])
+        
+        with col_input:
+            st.markdown("### 📥 Input Parameters")
             
-            # Create feature array (8 features)
-            features_8 = np.array([[
-                koi_fpflag_ss,
-                koi_fpflag_co,
-                koi_dikco_msky,
-                koi_dicco_msky,
-                koi_smet_err2,
-                earth_similarity,
-                log_snr,
-                koi_count
-            ]])
+            with st.form("classification_form"):
+                st.markdown("#### 🚩 Binary Flags")
+                col1, col2 = st.columns(2)
+                with col1:
+                    koi_fpflag_ss = st.selectbox(
+                        "Stellar Eclipse Flag",
+                        [0, 1],
+                        help="Is there a stellar eclipse? (0=No, 1=Yes)"
+                    )
+                with col2:
+                    koi_fpflag_co = st.selectbox(
+                        "Centroid Offset Flag",
+                        [0, 1],
+                        help="Is signal from nearby star? (0=No, 1=Yes)"
+                    )
+                
+                st.markdown("#### 📐 Angular Offsets (arcseconds)")
+                col1, col2 = st.columns(2)
+                with col1:
+                    koi_dikco_msky = st.number_input(
+                        "PRF Offset from KIC",
+                        min_value=0.0,
+                        max_value=20.0,
+                        value=0.5,
+                        step=0.1,
+                        help="Angular offset from catalog position"
+                    )
+                with col2:
+                    koi_dicco_msky = st.number_input(
+                        "PRF Offset OOT",
+                        min_value=0.0,
+                        max_value=20.0,
+                        value=0.3,
+                        step=0.1,
+                        help="Angular offset between images"
+                    )
+                
+                st.markdown("#### ⭐ Stellar & System Properties")
+                col1, col2 = st.columns(2)
+                with col1:
+                    koi_smet_err2 = st.number_input(
+                        "Stellar Metallicity Error",
+                        min_value=-1.0,
+                        max_value=0.0,
+                        value=-0.05,
+                        step=0.01,
+                        help="Negative error bound for metallicity"
+                    )
+                with col2:
+                    koi_count = st.number_input(
+                        "Number of Planets",
+                        min_value=1,
+                        max_value=10,
+                        value=1,
+                        step=1,
+                        help="Number of planets in the system"
+                    )
+                
+                st.markdown("#### 🌟 Star Properties")
+                col1, col2 = st.columns(2)
+                with col1:
+                    star_temp = st.number_input(
+                        "Star Temperature (K)",
+                        min_value=2000,
+                        max_value=40000,
+                        value=5778,
+                        step=100,
+                        help="Surface temperature of host star"
+                    )
+                with col2:
+                    star_radius = st.number_input(
+                        "Star Radius (Solar radii)",
+                        min_value=0.1,
+                        max_value=20.0,
+                        value=1.0,
+                        step=0.1,
+                        help="Size relative to our Sun"
+                    )
+                
+                st.markdown("#### 🪐 Planet Properties")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    koi_prad = st.number_input(
+                        "Planet Radius (Earth radii)",
+                        min_value=0.1,
+                        max_value=30.0,
+                        value=1.0,
+                        step=0.1,
+                        help="Size relative to Earth"
+                    )
+                with col2:
+                    koi_teq = st.number_input(
+                        "Equilibrium Temp (K)",
+                        min_value=100,
+                        max_value=3000,
+                        value=288,
+                        step=10,
+                        help="Planet temperature"
+                    )
+                with col3:
+                    koi_model_snr = st.number_input(
+                        "Signal-to-Noise Ratio",
+                        min_value=0.0,
+                        max_value=500.0,
+                        value=50.0,
+                        step=1.0,
+                        help="Transit signal strength"
+                    )
+                
+                st.markdown("#### 🔄 Orbital Parameters")
+                col1, col2 = st.columns(2)
+                with col1:
+                    orbital_period = st.number_input(
+                        "Orbital Period (days)",
+                        min_value=0.1,
+                        max_value=10000.0,
+                        value=365.25,
+                        step=1.0,
+                        help="Time for one complete orbit"
+                    )
+                with col2:
+                    orbit_distance = st.number_input(
+                        "Orbital Distance (AU)",
+                        min_value=0.01,
+                        max_value=100.0,
+                        value=1.0,
+                        step=0.01,
+                        help="Distance from star (1 AU = Earth-Sun distance)"
+                    )
+                
+                impact_param = st.slider(
+                    "Impact Parameter",
+                    min_value=0.0,
+                    max_value=1.0,
+                    value=0.5,
+                    step=0.01,
+                    help="How centered the transit is (0=center, 1=edge)"
+                )
+                
+                submitted = st.form_submit_button("🚀 Classify Planet", use_container_width=True)
+        
+        with col_output:
+            st.markdown("### 📊 Classification Results")
             
-            try:
-                if models.get('loaded', False):
-                    if is_binary:
-                        # Binary classification
-                        scaler = models['scaler_binary']
-                        poly = models['poly_binary']
-                        model = models['binary_model']
-                        
-                        features_scaled = scaler.transform(features_8)
-                        features_poly = poly.transform(features_scaled)
-                        
-                        prediction = model.predict(features_poly)[0]
-                        probabilities = model.predict_proba(features_poly)[0]
-                        
-                        st.markdown("""
-                        <div class="result-card">
-                            <h4>Predicted Class</h4>
-                            <p style='color: {}; font-size: 1.5rem; font-weight: bold;'>
-                            {}</p>
-                        </div>
-                        """.format(
-                            "#00ffc8" if prediction == 1 else "#ff6b6b",
-                            "✅ CONFIRMED PLANET" if prediction == 1 else "❌ FALSE POSITIVE"
-                        ), unsafe_allow_html=True)
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric("Confidence", f"{max(probabilities)*100:.1f}%")
-                        with col2:
-                            st.metric("Class", "Planet" if prediction == 1 else "Not Planet")
-                        
-                        st.markdown("#### Probability Distribution")
-                        st.write("*False Positive*")
-                        st.progress(float(probabilities[0]))
-                        st.write(f"{probabilities[0]*100:.2f}%")
-                        
-                        st.write("*Confirmed Planet*")
-                        st.progress(float(probabilities[1]))
-                        st.write(f"{probabilities[1]*100:.2f}%")
-                    
-                    else:
-                        # Multi-class classification
-                        scaler = models['scaler_multiclass']
-                        poly = models['poly_multiclass']
-                        model = models['multiclass_model']
-                        label_encoder = models['label_encoder']
-                        
-                        features_scaled = scaler.transform(features_8)
-                        features_poly = poly.transform(features_scaled)
-                        
-                        prediction = model.predict(features_poly)[0]
-                        probabilities = model.predict_proba(features_poly)[0]
-                        class_name = label_encoder.inverse_transform([prediction])[0]
-                        
-                        color_map = {
-                            'CONFIRMED': '#00ffc8',
-                            'CANDIDATE': '#ffd700',
-                            'FALSE POSITIVE': '#ff6b6b'
-                        }
+            if submitted:
+                # Transit depth (ppm) of the limb-darkened light curve, as
+                # measured for KOIs, and insolation relative to Earth
+                transit = lightcurve.transit_summary(orbital_period, impact_param, star_radius, koi_prad,
+                                                     sma=orbit_distance)
+                transit_depth = float(transit['depth_ppm'][0])
+                insolation = lightcurve.insolation(star_temp, star_radius, orbit_distance)
+                
+                # Form inputs as KOI columns; every engineered feature is derived
+                # from these by the shared feature library
+                koi_values = {
+                    'koi_fpflag_ss': koi_fpflag_ss,
+                    'koi_fpflag_co': koi_fpflag_co,
+                    'koi_dikco_msky': koi_dikco_msky,
+                    'koi_dicco_msky': koi_dicco_msky,
+                    'koi_smet_err2': koi_smet_err2,
+                    'koi_count': koi_count,
+                    'koi_prad': koi_prad,
+                    'koi_teq': koi_teq,
+                    'koi_model_snr': koi_model_snr,
+                    'koi_steff': star_temp,
+                    'koi_srad': star_radius,
+                    'koi_period': orbital_period,
+                    'koi_sma': orbit_distance,
+                    'koi_impact': impact_param,
+                    'koi_depth': transit_depth,
+                    'koi_insol': insolation
+                }
+                
+                try:
+                    pipeline = load_scoring_pipeline(pipeline_name)
+                    if pipeline is not None:
+                        # Same scoring path as bulk mode: one model pass gives
+                        # probabilities, the label is derived from them
+                        features_in, result = classify_koi(pipeline, koi_values)
+                        probabilities = result.probabilities[0]
+                        earth_similarity = features_in[0, pipeline.feature_index['earth_similarity']]
+                        log_snr = features_in[0, pipeline.feature_index['log_snr']]
                         
-                        st.markdown(f"""
-                        <div class="result-card">
-                            <h4>Predicted Class</h4>
-                            <p style='color: {color_map.get(class_name, "#00ffc8")}; font-size: 1.5rem; font-weight: bold;'>
-                            {class_name}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        if is_binary:
+                            # Binary classification
+                            prediction = result.indices[0]
+                            
+                            st.markdown("""
+                            <div class="result-card">
+                                <h4>Predicted Class</h4>
+                                <p style='color: {}; font-size: 1.5rem; font-weight: bold;'>
+                                {}</p>
+                            </div>
+                            """.format(
+                                "#00ffc8" if prediction == 1 else "#ff6b6b",
+                                "✅ CONFIRMED PLANET" if prediction == 1 else "❌ FALSE POSITIVE"
+                            ), unsafe_allow_html=True)
+                            
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                st.metric("Confidence", f"{max(probabilities)*100:.1f}%")
+                            with col2:
+                                st.metric("Class", "Planet" if prediction == 1 else "Not Planet")
+                            
+                            st.markdown("#### Probability Distribution")
+                            st.write("*False Positive*")
+                            st.progress(float(probabilities[0]))
+                            st.write(f"{probabilities[0]*100:.2f}%")
+                            
+                            st.write("*Confirmed Planet*")
+                            st.progress(float(probabilities[1]))
+                            st.write(f"{probabilities[1]*100:.2f}%")
                         
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.metric("Confidence", f"{max(probabilities)*100:.1f}%")
-                        with col2:
-                            st.metric("Predicted Class", class_name)
+                        else:
+                            # Multi-class classification
+                            class_name = result.labels[0]
+                            
+                            color_map = {
+                                'CONFIRMED': '#00ffc8',
+                                'CANDIDATE': '#ffd700',
+                                'FALSE POSITIVE': '#ff6b6b'
+                            }
+                            
+                            st.markdown(f"""
+                            <div class="result-card">
+                                <h4>Predicted Class</h4>
+                                <p style='color: {color_map.get(class_name, "#00ffc8")}; font-size: 1.5rem; font-weight: bold;'>
+                                {class_name}</p>
+                            </div>
+                            """, unsafe_allow_html=True)
+                            
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                st.metric("Confidence", f"{max(probabilities)*100:.1f}%")
+                            with col2:
+                                st.metric("Predicted Class", class_name)
+                            
+                            st.markdown("#### Class Probabilities")
+                            for i, class_label in enumerate(pipeline.classes):
+                                st.write(f"{class_label}")
+                                st.progress(float(probabilities[i]))
+                                st.write(f"{probabilities[i]*100:.2f}%")
                         
-                        st.markdown("#### Class Probabilities")
-                        for i, class_label in enumerate(label_encoder.classes_):
-                            st.write(f"{class_label}")
-                            st.progress(float(probabilities[i]))
-                            st.write(f"{probabilities[i]*100:.2f}%")
-                    
-                    with st.expander("🔍 View Calculated Features"):
-                        st.write(f"*Earth Similarity Index:* {earth_similarity:.4f}")
-                        st.write(f"*Log SNR:* {log_snr:.4f}")
-                        st.write(f"*Transit Depth:* {transit_depth:.2f} ppm")
-                        st.write(f"*Insolation:* {insolation:.4f} (relative to Earth)")
-                        st.write(f"*Input Features Shape:* {features_8.shape}")
-                
-                else:
-                    st.info("⚠ Running in demo mode - showing placeholder predictions")
+                        with st.expander("🔍 View Calculated Features"):
+                            st.write(f"*Earth Similarity Index:* {earth_similarity:.4f}")
+                            st.write(f"*Log SNR:* {log_snr:.4f}")
+                            st.write(f"*Transit Depth:* {transit_depth:.2f} ppm")
+                            if not np.isnan(transit['duration_hours'][0]):
+                                st.write(f"*Transit Duration:* {transit['duration_hours'][0]:.2f} h "
+                                         f"(ingress {transit['ingress_hours'][0]:.2f} h)")
+                            st.write(f"*Insolation:* {insolation:.4f} (relative to Earth)")
+                            st.write(f"*Input Features Shape:* {features_in.shape}")
                     
-                    if is_binary:
-                        st.markdown("""
-                        <div class="result-card">
-                            <h4>Predicted Class (Demo)</h4>
-                            <p style='color: #00ffc8; font-size: 1.5rem; font-weight: bold;'>
-                            ✅ CONFIRMED PLANET</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        st.write("*False Positive*")
-                        st.progress(0.25)
-                        st.write("25.0%")
-                        
-                        st.write("*Confirmed Planet*")
-                        st.progress(0.75)
-                        st.write("75.0%")
                     else:
-                        st.markdown("""
-                        <div class="result-card">
-                            <h4>Predicted Class (Demo)</h4>
-                            <p style='color: #00ffc8; font-size: 1.5rem; font-weight: bold;'>
-                            CONFIRMED</p>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        st.info("⚠ Running in demo mode - showing placeholder predictions")
+                        st.caption(f"Model not available: {get_model_registry().status()[pipeline_name]['error']}")
+                        calculated = features.derived_features(koi_values, ['earth_similarity', 'log_snr'])
+                        earth_similarity, log_snr = calculated['earth_similarity'], calculated['log_snr']
                         
-                        st.write("*CONFIRMED*")
-                        st.progress(0.70)
-                        st.write("70.0%")
-                        
-                        st.write("*CANDIDATE*")
-                        st.progress(0.20)
-                        st.write("20.0%")
-                        
-                        st.write("*FALSE POSITIVE*")
-                        st.progress(0.10)
-                        st.write("10.0%")
-                    
-                    with st.expander("🔍 View Calculated Features"):
-                        st.write(f"*Earth Similarity Index:* {earth_similarity:.4f}")
-                        st.write(f"*Log SNR:* {log_snr:.4f}")
-                        st.write(f"*Transit Depth:* {transit_depth:.2f} ppm")
-                        st.write(f"*Insolation:* {insolation:.4f} (relative to Earth)")
+                        if is_binary:
+                            st.markdown("""
+                            <div class="result-card">
+                                <h4>Predicted Class (Demo)</h4>
+                                <p style='color: #00ffc8; font-size: 1.5rem; font-weight: bold;'>
+                                ✅ CONFIRMED PLANET</p>
+                            </div>
+                            """, unsafe_allow_html=True)
+                            
+                            st.write("*False Positive*")
+                            st.progress(0.25)
+                            st.write("25.0%")
+                            
+                            st.write("*Confirmed Planet*")
+                            st.progress(0.75)
+                            st.write("75.0%")
+                        else:
+                            st.markdown("""
+                            <div class="result-card">
+                                <h4>Predicted Class (Demo)</h4>
+                                <p style='color: #00ffc8; font-size: 1.5rem; font-weight: bold;'>
+                                CONFIRMED</p>
+                            </div>
+                            """, unsafe_allow_html=True)
+                            
+                            st.write("*CONFIRMED*")
+                            st.progress(0.70)
+                            st.write("70.0%")
+                            
+                            st.write("*CANDIDATE*")
+                            st.progress(0.20)
+                            st.write("20.0%")
+                            
+                            st.write("*FALSE POSITIVE*")
+                            st.progress(0.10)
+                            st.write("10.0%")
                         
-            except Exception as e:
-                st.error(f"Error during prediction: {str(e)}")
-                st.exception(e)
+                        with st.expander("🔍 View Calculated Features"):
+                            st.write(f"*Earth Similarity Index:* {earth_similarity:.4f}")
+                            st.write(f"*Log SNR:* {log_snr:.4f}")
+                            st.write(f"*Transit Depth:* {transit_depth:.2f} ppm")
+                            if not np.isnan(transit['duration_hours'][0]):
+                                st.write(f"*Transit Duration:* {transit['duration_hours'][0]:.2f} h "
+                                         f"(ingress {transit['ingress_hours'][0]:.2f} h)")
+                            st.write(f"*Insolation:* {insolation:.4f} (relative to Earth)")
+                            
+                except Exception as e:
+                    st.error(f"Error during prediction: {str(e)}")
+                    st.exception(e)
+            
+            else:
+                st.info("👆 Enter parameters and click 'Classify Planet' to see results")
         
-        else:
-            st.info("👆 Enter parameters and click 'Classify Planet' to see results")
-    
-    st.markdown("---")
-    # --- 3D Visualization & Simulation ---
-
-    st.markdown("## 🌌 3D Visualization & Simulation")
-
-    # Ensure base_dir points to the folder containing this script (e.g., /Nasa)
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    html_path = os.path.join(base_dir, "Index.html")
-
-    if submitted and os.path.exists(html_path):
-    # Prepare parameters to send to simulation (cast to floats safely)
-        params = {
-            "orbitDistance": float(orbit_distance),
-            "planetRadius": float(koi_prad),
-            "orbitalPeriod": float(orbital_period),
-            "planetTemp": float(koi_teq),
-            "impactParam": float(impact_param),
-            "starTemp": float(star_temp),
-            "starRadius": float(star_radius),
-            "insolation": float(insolation),
-            "transitDepth": float(transit_depth)
-        }
-
-    # Load Index.html directly from the same folder as this script
-        with open(html_path, "r", encoding="utf-8") as f:
-            sim_html = f.read()
-
-    # Replace the default exoParams in HTML with actual params
-        params_js = json.dumps(params)
-        start_marker = "let exoParams = {"
-        end_marker = "};"
-        start_index = sim_html.find(start_marker)
-
-        if start_index != -1:
-        # find() returns -1 if not found; protect against that
-            end_index = sim_html.find(end_marker, start_index)
-            if end_index != -1:
-                end_index += len(end_marker)
-                sim_html = sim_html[:start_index] + f"let exoParams = {params_js};" + sim_html[end_index:]
+    with st.expander("🗂 Model Status"):
+        for name, status in get_model_registry().status().items():
+            if status['loaded']:
+                version = f" (bundle {status['version']})" if status['version'] else ""
+                st.write(f"✅ *{name}*{version}: loaded in {status['load_time']:.2f} s")
+            elif status['error']:
+                st.write(f"❌ *{name}*: {status['error']}")
             else:
-            # fallback: append the params near the start marker if end marker not found
-                sim_html = sim_html[:start_index] + f"let exoParams = {params_js};" + sim_html[start_index + len(start_marker):]
-
-    # Render HTML in an iframe-like container
-        components.html(sim_html, height=800, scrolling=False)
+                st.write(f"⏳ *{name}*: not loaded yet")
+            if status['reloading']:
+                st.write(f"🔄 *{name}*: loading a new version in the background")
+            if status['reload_error']:
+                st.write(f"⚠️ *{name}*: reload failed, still serving the current version ({status['reload_error']})")
+            for version, in_flight in status['draining'].items():
+                st.write(f"⌛ *{name}*: draining {version} ({in_flight} prediction(s) in flight)")
+        if st.button("🔄 Reload models", help="Load the newest bundles in the background and swap them in when ready"):
+            for name in artifacts.PIPELINE_FILES:
+                get_model_registry().reload(name)
+            st.toast("Reloading models in the background")
+        cache_stats = get_prediction_cache().stats()
+        st.write(
+            f"🗃 *Prediction cache*: {cache_stats['size']}/{cache_stats['maxsize']} entries, "
+            f"{cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']*100:.0f}% hit rate)"
+        )
+    
+    if not bulk_mode:
+        st.markdown("---")
+        # --- 3D Visualization & Simulation ---
 
-    elif os.path.exists(html_path):
-        st.info("👆 Submit the classification form to view the 3D simulation with your parameters")
-    else:
-        st.warning("⚠️ 3D visualization file (Index.html) not found in the same folder as this script")
+        st.markdown("## 🌌 3D Visualization & Simulation")
 
-    st.markdown("---")
-
-# --- Comparison Section ---
-    if submitted:
-        st.markdown("### 📊 System Comparison")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.markdown(
-                """
-                <div class="comparison-card">
-                    <h4>🌍 Earth System</h4>
-                    <p><strong>Orbital Period:</strong> 365.25 days</p>
-                    <p><strong>Distance from Star:</strong> 1 AU</p>
-                    <p><strong>Planet Radius:</strong> 1.0 Earth radii</p>
-                    <p><strong>Temperature:</strong> 288 K</p>
-                    <p><strong>Insolation:</strong> 1.0</p>
-                </div>
-                """,
-                unsafe_allow_html=True
+        if submitted:
+            # Prepare parameters to send to simulation (cast to floats safely)
+            st.session_state.simulation_params = {
+                "orbitDistance": float(orbit_distance),
+                "planetRadius": float(koi_prad),
+                "orbitalPeriod": float(orbital_period),
+                "planetTemp": float(koi_teq),
+                "impactParam": float(impact_param),
+                "starTemp": float(star_temp),
+                "starRadius": float(star_radius),
+                "insolation": float(insolation),
+                "transitDepth": float(transit_depth)
+            }
+            # Sampled on the server and sent as raw float32, so the page only plots it
+            st.session_state.simulation_light_curve = lightcurve.to_bytes(*lightcurve.transit_light_curve(
+                orbital_period, impact_param, star_radius, koi_prad, sma=orbit_distance))
+
+        if not os.path.exists(os.path.join(SIMULATION_DIR, "index.html")):
+            st.warning("⚠️ 3D visualization files (simulation/index.html) not found next to this script")
+        elif st.session_state.get('simulation_params'):
+            # Rendered on every rerun under a fixed key, so the iframe and its
+            # WebGL scenes stay alive and re-submits only post new parameters
+            # The page reports its quality tier whenever it changes
+            simulation_quality = exoplanet_simulation(
+                params=st.session_state.simulation_params, height=800,
+                lightCurve=st.session_state.get('simulation_light_curve'),
+                quality=SIMULATION_QUALITY, frameBudgetMs=SIMULATION_FRAME_BUDGET_MS,
+                key="exoplanet_simulation", default=None,
             )
+            if simulation_quality:
+                st.caption(
+                    f"🎛 Rendering quality: {simulation_quality['tier']} ({simulation_quality['mode']}), "
+                    f"{simulation_quality['fps']} fps, {simulation_quality['frameMs']:.1f} ms per frame "
+                    f"(budget {SIMULATION_FRAME_BUDGET_MS:.0f} ms)"
+                )
+        else:
+            st.info("👆 Submit the classification form to view the 3D simulation with your parameters")
 
-        with col2:
-            # Format numeric values safely
-            try:
-                orbital_period_f = float(orbital_period)
-            except Exception:
-                orbital_period_f = orbital_period
-
-            try:
-                orbit_distance_f = float(orbit_distance)
-            except Exception:
-                orbit_distance_f = orbit_distance
-
-            try:
-                koi_prad_f = float(koi_prad)
-            except Exception:
-                koi_prad_f = koi_prad
+        st.markdown("---")
 
-            try:
-                koi_teq_f = float(koi_teq)
-            except Exception:
-                koi_teq_f = koi_teq
+    # --- Comparison Section ---
+        if submitted:
+            st.markdown("### 📊 System Comparison")
+            col1, col2 = st.columns(2)
 
-            try:
-                insolation_f = float(insolation)
-            except Exception:
-                insolation_f = insolation
+            with col1:
+                st.markdown(
+                    """
+                    <div class="comparison-card">
+                        <h4>🌍 Earth System</h4>
+                        <p><strong>Orbital Period:</strong> 365.25 days</p>
+                        <p><strong>Distance from Star:</strong> 1 AU</p>
+                        <p><strong>Planet Radius:</strong> 1.0 Earth radii</p>
+                        <p><strong>Temperature:</strong> 288 K</p>
+                        <p><strong>Insolation:</strong> 1.0</p>
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
 
-            try:
-                transit_depth_f = float(transit_depth)
-            except Exception:
-                transit_depth_f = transit_depth
-
-            st.markdown(
-                f"""
-                <div class="comparison-card">
-                    <h4>🪐 Your Exoplanet</h4>
-                    <p><strong>Orbital Period:</strong> {orbital_period_f:.1f} days</p>
-                    <p><strong>Distance from Star:</strong> {orbit_distance_f:.2f} AU</p>
-                    <p><strong>Planet Radius:</strong> {koi_prad_f:.2f} Earth radii</p>
-                    <p><strong>Temperature:</strong> {koi_teq_f} K</p>
-                    <p><strong>Insolation:</strong> {insolation_f:.2f}</p>
-                    <p><strong>Transit Depth:</strong> {transit_depth_f:.0f} ppm</p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+            with col2:
+                # Format numeric values safely
+                try:
+                    orbital_period_f = float(orbital_period)
+                except Exception:
+                    orbital_period_f = orbital_period
+
+                try:
+                    orbit_distance_f = float(orbit_distance)
+                except Exception:
+                    orbit_distance_f = orbit_distance
+
+                try:
+                    koi_prad_f = float(koi_prad)
+                except Exception:
+                    koi_prad_f = koi_prad
+
+                try:
+                    koi_teq_f = float(koi_teq)
+                except Exception:
+                    koi_teq_f = koi_teq
+
+                try:
+                    insolation_f = float(insolation)
+                except Exception:
+                    insolation_f = insolation
+
+                try:
+                    transit_depth_f = float(transit_depth)
+                except Exception:
+                    transit_depth_f = transit_depth
+
+                st.markdown(
+                    f"""
+                    <div class="comparison-card">
+                        <h4>🪐 Your Exoplanet</h4>
+                        <p><strong>Orbital Period:</strong> {orbital_period_f:.1f} days</p>
+                        <p><strong>Distance from Star:</strong> {orbit_distance_f:.2f} AU</p>
+                        <p><strong>Planet Radius:</strong> {koi_prad_f:.2f} Earth radii</p>
+                        <p><strong>Temperature:</strong> {koi_teq_f} K</p>
+                        <p><strong>Insolation:</strong> {insolation_f:.2f}</p>
+                        <p><strong>Transit Depth:</strong> {transit_depth_f:.0f} ppm</p>
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
 
 # ============================================================================
 # RESEARCH PAGE
@@ -879,8 +1182,31 @@ elif st.session_state.current_page == "Research":
         
         st.markdown(f"#### ⚙ {algorithm} Hyperparameters")
         
+        sweep_mode = algorithm in training.TRAINERS and st.toggle(
+            "🔁 Sweep mode",
+            help="Train every combination of several values per parameter in parallel"
+        )
+        if algorithm in training.TRAINERS and not sweep_mode:
+            st.toggle(
+                f"📐 {datasets.CV_FOLDS}-fold cross-validation", key="cv_mode",
+                help="Report mean ± std over stratified folds instead of a single train/test split"
+            )
+        
+        if sweep_mode:
+            with st.form("sweep_form"):
+                st.caption("Comma-separated values; every combination is trained, clearly worse trials stop early")
+                grid_fields = {
+                    name: st.text_input(label, default)
+                    for name, (label, default) in SWEEP_GRIDS[algorithm].items()
+                }
+                sweep_button = st.form_submit_button("🚀 Run Sweep", use_container_width=True)
+            
+            if sweep_button:
+                grid = {name: training.parse_grid_values(text) for name, text in grid_fields.items()}
+                submit_sweep_job(algorithm, grid)
+        
         # Hyperparameters based on selected algorithm
-        if algorithm == "Random Forest":
+        elif algorithm == "Random Forest":
             with st.form("rf_form"):
                 n_estimators = st.number_input("Number of Trees (n_estimators)", 
                                               min_value=10, max_value=2000, value=1000, step=50,
@@ -901,102 +1227,13 @@ elif st.session_state.current_page == "Research":
                 train_button = st.form_submit_button("🚀 Train Model", use_container_width=True)
                 
                 if train_button:
-                    with st.spinner("Training Random Forest... This may take a few minutes."):
-                        try:
-                            from sklearn.ensemble import RandomForestClassifier
-                            from sklearn.preprocessing import StandardScaler
-                            from sklearn.model_selection import train_test_split
-                            from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-                            import time
-                            
-                            # Load dataset
-                            base_dir = os.path.dirname(os.path.abspath(__file__))
-
-                            # Ensure it looks inside the same folder (Nasa/)
-                            data_path = os.path.join(base_dir, "cumulative_2025.10.02_20.38.17.csv")
-                            if not os.path.exists(data_path):
-                                st.error(f"Dataset not found: {data_path}")
-                            else:
-                                start_time = time.time()
-                                
-                                # Data preprocessing (simplified version)
-                                df = pd.read_csv(data_path)
-                                
-                                # Drop columns
-                                drop_cols = ["koi_longp", "koi_ingress", "koi_model_dof", "koi_model_chisq", 
-                                            "koi_sage", "rowid", "kepoi_name", "kepid", "kepler_name",
-                                            "koi_pdisposition", "koi_score", "koi_time0bk", "koi_comment", 
-                                            "koi_limbdark_mod", "koi_parm_prov", "koi_trans_mod", 
-                                            "koi_datalink_dvr", "koi_datalink_dvs", "koi_tce_delivname", 
-                                            "koi_sparprov", "koi_vet_stat", "koi_vet_date", "koi_disp_prov",
-                                            "koi_ldm_coeff3", "koi_ldm_coeff4"]
-                                
-                                df = df.drop(columns=[c for c in drop_cols if c in df.columns], errors="ignore")
-                                
-                                # Prepare target
-                                from sklearn.preprocessing import LabelEncoder
-                                le = LabelEncoder()
-                                y = le.fit_transform(df['koi_disposition'])
-                                
-                                # Select numerical features
-                                numerical_features = df.select_dtypes(include=['float64', 'int64']).columns
-                                numerical_features = [col for col in numerical_features if col != 'koi_disposition']
-                                X = df[numerical_features].fillna(df[numerical_features].median())
-                                
-                                # Train-test split
-                                X_train, X_test, y_train, y_test = train_test_split(
-                                    X, y, test_size=0.2, random_state=42, stratify=y
-                                )
-                                
-                                # Scale features
-                                scaler = StandardScaler()
-                                X_train_scaled = scaler.fit_transform(X_train)
-                                X_test_scaled = scaler.transform(X_test)
-                                
-                                # Train model
-                                model = RandomForestClassifier(
-                                    n_estimators=n_estimators,
-                                    max_depth=max_depth,
-                                    min_samples_split=min_samples_split,
-                                    min_samples_leaf=min_samples_leaf,
-                                    max_features=max_features,
-                                    random_state=42,
-                                    n_jobs=-1
-                                )
-                                
-                                model.fit(X_train_scaled, y_train)
-                                
-                                # Evaluate
-                                y_pred = model.predict(X_test_scaled)
-                                accuracy = accuracy_score(y_test, y_pred)
-                                cm = confusion_matrix(y_test, y_pred)
-                                report = classification_report(y_test, y_pred, target_names=le.classes_, output_dict=True)
-                                
-                                training_time = time.time() - start_time
-                                
-                                # Store results
-                                st.session_state.training_results = {
-                                    'algorithm': algorithm,
-                                    'accuracy': accuracy,
-                                    'confusion_matrix': cm,
-                                    'classification_report': report,
-                                    'training_time': training_time,
-                                    'classes': le.classes_,
-                                    'hyperparameters': {
-                                        'n_estimators': n_estimators,
-                                        'max_depth': max_depth,
-                                        'min_samples_split': min_samples_split,
-                                        'min_samples_leaf': min_samples_leaf,
-                                        'max_features': str(max_features)
-                                    }
-                                }
-                                st.session_state.training_complete = True
-                                st.success(f"✅ Training completed in {training_time:.2f} seconds!")
-                                st.rerun()
-                                
-                        except Exception as e:
-                            st.error(f"Error during training: {str(e)}")
-                            st.exception(e)
+                    submit_training_job(algorithm, {
+                        'n_estimators': n_estimators,
+                        'max_depth': max_depth,
+                        'min_samples_split': min_samples_split,
+                        'min_samples_leaf': min_samples_leaf,
+                        'max_features': max_features
+                    })
         
         elif algorithm == "XGBoost":
             with st.form("xgb_form"):
@@ -1016,92 +1253,14 @@ elif st.session_state.current_page == "Research":
                 train_button = st.form_submit_button("🚀 Train Model", use_container_width=True)
                 
                 if train_button:
-                    with st.spinner("Training XGBoost..."):
-                        try:
-                            import xgboost as xgb
-                            from sklearn.preprocessing import StandardScaler
-                            from sklearn.model_selection import train_test_split
-                            from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-                            import time
-                            
-                            base_dir = os.path.dirname(os.path.abspath(__file__))
-
-                            # Ensure it looks inside the same folder (Nasa/)
-                            data_path = os.path.join(base_dir, "cumulative_2025.10.02_20.38.17.csv")
-                            if not os.path.exists(data_path):
-                                st.error(f"Dataset not found: {data_path}")
-                            else:
-                                start_time = time.time()
-                                
-                                df = pd.read_csv(data_path)
-                                drop_cols = ["koi_longp", "koi_ingress", "koi_model_dof", "koi_model_chisq", 
-                                            "koi_sage", "rowid", "kepoi_name", "kepid", "kepler_name",
-                                            "koi_pdisposition", "koi_score", "koi_time0bk", "koi_comment", 
-                                            "koi_limbdark_mod", "koi_parm_prov", "koi_trans_mod", 
-                                            "koi_datalink_dvr", "koi_datalink_dvs", "koi_tce_delivname", 
-                                            "koi_sparprov", "koi_vet_stat", "koi_vet_date", "koi_disp_prov",
-                                            "koi_ldm_coeff3", "koi_ldm_coeff4"]
-                                df = df.drop(columns=[c for c in drop_cols if c in df.columns], errors="ignore")
-                                
-                                from sklearn.preprocessing import LabelEncoder
-                                le = LabelEncoder()
-                                y = le.fit_transform(df['koi_disposition'])
-                                
-                                numerical_features = df.select_dtypes(include=['float64', 'int64']).columns
-                                numerical_features = [col for col in numerical_features if col != 'koi_disposition']
-                                X = df[numerical_features].fillna(df[numerical_features].median())
-                                
-                                X_train, X_test, y_train, y_test = train_test_split(
-                                    X, y, test_size=0.2, random_state=42, stratify=y
-                                )
-                                
-                                scaler = StandardScaler()
-                                X_train_scaled = scaler.fit_transform(X_train)
-                                X_test_scaled = scaler.transform(X_test)
-                                
-                                model = xgb.XGBClassifier(
-                                    n_estimators=n_estimators,
-                                    max_depth=max_depth,
-                                    learning_rate=learning_rate,
-                                    subsample=subsample,
-                                    colsample_bytree=colsample_bytree,
-                                    gamma=gamma,
-                                    random_state=42,
-                                    eval_metric='mlogloss',
-                                    n_jobs=-1
-                                )
-                                
-                                model.fit(X_train_scaled, y_train)
-                                
-                                y_pred = model.predict(X_test_scaled)
-                                accuracy = accuracy_score(y_test, y_pred)
-                                cm = confusion_matrix(y_test, y_pred)
-                                report = classification_report(y_test, y_pred, target_names=le.classes_, output_dict=True)
-                                
-                                training_time = time.time() - start_time
-                                
-                                st.session_state.training_results = {
-                                    'algorithm': algorithm,
-                                    'accuracy': accuracy,
-                                    'confusion_matrix': cm,
-                                    'classification_report': report,
-                                    'training_time': training_time,
-                                    'classes': le.classes_,
-                                    'hyperparameters': {
-                                        'n_estimators': n_estimators,
-                                        'max_depth': max_depth,
-                                        'learning_rate': learning_rate,
-                                        'subsample': subsample,
-                                        'colsample_bytree': colsample_bytree,
-                                        'gamma': gamma
-                                    }
-                                }
-                                st.session_state.training_complete = True
-                                st.success(f"✅ Training completed in {training_time:.2f} seconds!")
-                                st.rerun()
-                                
-                        except Exception as e:
-                            st.error(f"Error: {str(e)}")
+                    submit_training_job(algorithm, {
+                        'n_estimators': n_estimators,
+                        'max_depth': max_depth,
+                        'learning_rate': learning_rate,
+                        'subsample': subsample,
+                        'colsample_bytree': colsample_bytree,
+                        'gamma': gamma
+                    })
         
         elif algorithm == "LightGBM":
             with st.form("lgb_form"):
@@ -1121,7 +1280,14 @@ elif st.session_state.current_page == "Research":
                 train_button = st.form_submit_button("🚀 Train Model", use_container_width=True)
                 
                 if train_button:
-                    st.info("Training LightGBM - feature implementation similar to XGBoost above")
+                    submit_training_job(algorithm, {
+                        'n_estimators': n_estimators,
+                        'max_depth': max_depth,
+                        'learning_rate': learning_rate,
+                        'num_leaves': num_leaves,
+                        'subsample': subsample,
+                        'colsample_bytree': colsample_bytree
+                    })
         
         elif algorithm == "CatBoost":
             with st.form("cat_form"):
@@ -1137,7 +1303,12 @@ elif st.session_state.current_page == "Research":
                 train_button = st.form_submit_button("🚀 Train Model", use_container_width=True)
                 
                 if train_button:
-                    st.info("Training CatBoost - feature implementation similar to above")
+                    submit_training_job(algorithm, {
+                        'n_estimators': iterations,
+                        'depth': depth,
+                        'learning_rate': learning_rate,
+                        'l2_leaf_reg': l2_leaf_reg
+                    })
         
         elif algorithm == "AdaBoost":
             with st.form("ada_form"):
@@ -1145,12 +1316,16 @@ elif st.session_state.current_page == "Research":
                                               min_value=10, max_value=1000, value=500, step=50)
                 learning_rate = st.number_input("Learning Rate", 
                                                min_value=0.01, max_value=2.0, value=0.1, step=0.05)
-                algorithm_type = st.selectbox("Algorithm", ["SAMME", "SAMME.R"])
                 
                 train_button = st.form_submit_button("🚀 Train Model", use_container_width=True)
                 
                 if train_button:
-                    st.info("Training AdaBoost - feature implementation similar to above")
+                    submit_training_job(algorithm, {
+                        'n_estimators': n_estimators,
+                        'learning_rate': learning_rate,
+                        # SAMME.R is deprecated in scikit-learn 1.4 and removed in 1.6
+                        'algorithm': 'SAMME'
+                    })
         
         elif algorithm == "Gradient Boosting":
             with st.form("gb_form"):
@@ -1160,26 +1335,51 @@ elif st.session_state.current_page == "Research":
                                            min_value=1, max_value=20, value=5, step=1)
                 learning_rate = st.number_input("Learning Rate", 
                                                min_value=0.01, max_value=0.5, value=0.1, step=0.01)
-                subsample = st.slider("Subsample", 
-                                     min_value=0.5, max_value=1.0, value=0.8, step=0.05)
+                max_features = st.slider("Feature Fraction (max_features)", 
+                                        min_value=0.5, max_value=1.0, value=0.8, step=0.05,
+                                        help="Fraction of features considered at each split")
                 
                 train_button = st.form_submit_button("🚀 Train Model", use_container_width=True)
                 
                 if train_button:
-                    st.info("Training Gradient Boosting - feature implementation similar to above")
+                    submit_training_job(algorithm, {
+                        'n_estimators': n_estimators,
+                        'max_depth': max_depth,
+                        'learning_rate': learning_rate,
+                        'max_features': max_features
+                    })
     
     with col_right:
         st.markdown("### 📊 Training Results")
         
-        if st.session_state.training_complete and st.session_state.training_results:
+        if st.session_state.get('sweep_job'):
+            sweep_progress(st.session_state.sweep_job)
+        elif st.session_state.get('cv_job'):
+            cv_progress(st.session_state.cv_job)
+        elif st.session_state.get('training_job'):
+            training_job_progress(st.session_state.training_job)
+        elif st.session_state.training_complete and st.session_state.training_results:
             results = st.session_state.training_results
             
-            # Metrics
+            if st.session_state.get('sweep_leaderboard'):
+                with st.expander("🏆 Sweep Leaderboard", expanded=True):
+                    show_leaderboard(st.session_state.sweep_leaderboard)
+                    st.caption("The best completed trial is shown below")
+            
+            # Metrics; cross-validated runs show fold mean ± std and wall time
+            cv = results.get('cv')
+            if cv:
+                accuracy = f"{cv['accuracy'][0]*100:.2f}% ± {cv['accuracy'][1]*100:.2f}%"
+                timing = (f"{results['training_time']:.2f} seconds wall time "
+                          f"({cv['folds']} folds, {cv['fold_time']:.2f} s of fitting)")
+            else:
+                accuracy = f"{results['accuracy']*100:.2f}%"
+                timing = f"{results['training_time']:.2f} seconds"
             st.markdown(f"""
             <div class="result-card">
-                <h4>{results['algorithm']} Performance</h4>
-                <p><strong>Accuracy:</strong> <span style='color: #00ffc8; font-size: 1.5rem;'>{results['accuracy']*100:.2f}%</span></p>
-                <p><strong>Training Time:</strong> {results['training_time']:.2f} seconds</p>
+                <h4>{results['algorithm']} Performance{f" ({cv['folds']}-fold CV)" if cv else ""}</h4>
+                <p><strong>Accuracy:</strong> <span style='color: #00ffc8; font-size: 1.5rem;'>{accuracy}</span></p>
+                <p><strong>Training Time:</strong> {timing}</p>
             </div>
             """, unsafe_allow_html=True)
             
@@ -1187,12 +1387,13 @@ elif st.session_state.current_page == "Research":
             col1, col2, col3 = st.columns(3)
             report = results['classification_report']
             
-            with col1:
-                st.metric("Precision", f"{report['weighted avg']['precision']:.3f}")
-            with col2:
-                st.metric("Recall", f"{report['weighted avg']['recall']:.3f}")
-            with col3:
-                st.metric("F1-Score", f"{report['weighted avg']['f1-score']:.3f}")
+            for column, label, metric in ((col1, "Precision", 'precision'), (col2, "Recall", 'recall'),
+                                          (col3, "F1-Score", 'f1-score')):
+                with column:
+                    if cv:
+                        st.metric(label, f"{cv[metric][0]:.3f} ± {cv[metric][1]:.3f}")
+                    else:
+                        st.metric(label, f"{report['weighted avg'][metric]:.3f}")
             
             # Confusion Matrix
             st.markdown("#### Confusion Matrix")
@@ -1239,10 +1440,25 @@ elif st.session_state.current_page == "Research":
                 for key, value in results['hyperparameters'].items():
                     st.write(f"{key}: {value}")
             
+            # Serve this run on the classification pages
+            if results.get('bundle_path') and os.path.isdir(results['bundle_path']):
+                st.caption(f"Model saved as bundle `{os.path.basename(results['bundle_path'])}`")
+                if st.button("📦 Deploy to Classification", use_container_width=True,
+                             help="Promote this model to the bundle the classification pages load"):
+                    try:
+                        promoted = artifacts.promote_bundle(results['bundle_path'])
+                    except (OSError, ValueError) as e:
+                        st.error(f"Could not deploy the model: {e}")
+                    else:
+                        # Swapped in once loaded; predictions meanwhile use the current model
+                        get_model_registry().reload(artifacts.read_manifest(promoted)['name'])
+                        st.success(f"Deployed as {os.path.basename(promoted)}")
+            
             # Clear results button
             if st.button("🔄 Train New Model", use_container_width=True):
                 st.session_state.training_complete = False
                 st.session_state.training_results = {}
+                st.session_state.sweep_leaderboard = None
                 st.rerun()
         
         else:
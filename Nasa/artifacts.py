@@ -0,0 +1,546 @@
+"""Loading and exporting the classification pipeline artifacts.
+
+Three on-disk formats are supported, tried in this order:
+
+* bundle: a versioned directory ``bundles/<name>-<version>/`` holding
+  ``manifest.json`` (feature order, derived-feature formulas, content
+  hashes, training metrics and load hints), the model in its library's
+  own format or skops for scikit-learn, never a pickle (see
+  MODEL_FORMATS), and ``preprocess.npz``.
+* native: loose ``<name>_model.ubj`` (XGBoost UBJSON booster) plus
+  ``<name>_preprocess.npz`` (scaler, polynomial powers, feature order and
+  class names as plain arrays).
+* pickle: the original ``*.pkl`` files, used as a fallback.
+
+Research page training runs are written as bundles under ``.cache/runs``;
+``promote_bundle`` copies one into ``bundles/`` to serve it.
+
+Usage:
+    python artifacts.py bundle multiclass --version 2025.10.04
+    python artifacts.py list
+    python artifacts.py export multiclass
+    python artifacts.py promote .cache/runs/multiclass-2025.10.20.101500-xgboost-1a2b3c
+    python artifacts.py check
+"""
+import argparse
+import hashlib
+import io
+import json
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from features import DERIVED_FEATURE_FORMULAS
+from pipeline import BoosterModel, CatBoostModel, LightGBMModel, Pipeline
+from preprocessing import sklearn_transform
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_DIR = os.path.join(BASE_DIR, "bundles")
+
+# Bumped whenever the manifest layout changes incompatibly
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+# Binary models predict 0 = false positive, 1 = confirmed planet
+BINARY_CLASSES = ['FALSE POSITIVE', 'CONFIRMED']
+
+PIPELINE_FILES = {
+    'binary': {
+        'model': 'binary_model.pkl',
+        'scaler': 'scaler_binary.pkl',
+        'poly': 'poly_transformer_binary.pkl',
+    },
+    'multiclass': {
+        'model': 'multiclass_model.pkl',
+        'scaler': 'scaler_multiclass.pkl',
+        'poly': 'poly_transformer_multiclass.pkl',
+        'label_encoder': 'label_encoder_multiclass.pkl',
+        'feature_names': 'feature_names_multiclass.pkl',
+    },
+}
+
+# Model file of a bundle per format.  scikit-learn has no native model
+# format, so its estimators are stored with skops, which rebuilds them
+# without unpickling.
+MODEL_FORMATS = {
+    'xgboost-ubj': "model.ubj",
+    'lightgbm-txt': "model.txt",
+    'catboost-cbm': "model.cbm",
+    'sklearn-skops': "model.skops",
+}
+
+# Types skops may construct beyond its own safe defaults: the trees of the
+# Random Forest, AdaBoost and Gradient Boosting estimators
+SKOPS_TRUSTED_TYPES = [
+    'sklearn.tree._tree.Tree',
+    'sklearn.ensemble._hist_gradient_boosting.predictor.TreePredictor',
+]
+
+NATIVE_MODEL_FILE = "{name}_model.ubj"
+NATIVE_PREPROCESS_FILE = "{name}_preprocess.npz"
+
+
+def _load_pickle(base_dir, filename):
+    with open(os.path.join(base_dir, filename), "rb") as f:
+        return pickle.load(f)
+
+
+def load_pickle_pipeline(name, base_dir=BASE_DIR):
+    """Load the pickled artifacts of the 'binary' or 'multiclass' pipeline"""
+    files = PIPELINE_FILES[name]
+    scaler = _load_pickle(base_dir, files['scaler'])
+    poly = _load_pickle(base_dir, files['poly'])
+    model = _load_pickle(base_dir, files['model'])
+
+    if name == 'binary':
+        return Pipeline.from_sklearn(name, scaler, poly, model, BINARY_CLASSES)
+
+    label_encoder = _load_pickle(base_dir, files['label_encoder'])
+    feature_names = _load_pickle(base_dir, files['feature_names'])
+    return Pipeline.from_sklearn(
+        name, scaler, poly, model, label_encoder.classes_,
+        passthrough_features=feature_names['all_selected_features'],
+        poly_features=feature_names['top_8_features'],
+    )
+
+
+def read_file(path, expected_sha256=None):
+    """Read a whole file into one buffer, verifying its SHA-256 if given.
+
+    The checksum is computed on the same bytes the caller parses, so a file
+    replaced between the two cannot slip through.
+    """
+    with open(path, "rb") as f:
+        contents = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(contents)
+    if expected_sha256 is not None:
+        digest = hashlib.sha256(contents).hexdigest()
+        if digest != expected_sha256:
+            raise ValueError(f"Checksum mismatch for {path}: expected {expected_sha256}, got {digest}")
+    return contents
+
+
+def file_sha256(path):
+    """SHA-256 of a file, hashed through a memory map without reading it in"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return hashlib.sha256(mm).hexdigest()
+
+
+def load_booster(source):
+    """Load a native XGBoost model from a path (read by XGBoost itself) or
+    the raw file contents"""
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(source)
+    return booster
+
+
+def save_model(model, directory):
+    """Write a fitted model (or model wrapper) to directory in its native
+    format; returns the file name and the format"""
+    library = type(model).__module__.split(".")[0]
+    if isinstance(model, BoosterModel) or library == "xgboost":
+        model_format = 'xgboost-ubj'
+    elif isinstance(model, LightGBMModel) or library == "lightgbm":
+        model_format = 'lightgbm-txt'
+    elif isinstance(model, CatBoostModel) or library == "catboost":
+        model_format = 'catboost-cbm'
+    else:
+        model_format = 'sklearn-skops'
+    filename = MODEL_FORMATS[model_format]
+    path = os.path.join(directory, filename)
+
+    if model_format == 'xgboost-ubj':
+        booster = model.booster if isinstance(model, BoosterModel) else model.get_booster()
+        booster.save_model(path)
+    elif model_format == 'lightgbm-txt':
+        booster = model.booster if isinstance(model, LightGBMModel) else model.booster_
+        booster.save_model(path)
+    elif model_format == 'catboost-cbm':
+        (model.model if isinstance(model, CatBoostModel) else model).save_model(path, format="cbm")
+    else:
+        import skops.io
+
+        skops.io.dump(model, path)
+        # Refuse now rather than write a bundle that load_model rejects
+        untrusted = set(skops.io.get_untrusted_types(file=path)) - set(SKOPS_TRUSTED_TYPES)
+        if untrusted:
+            os.remove(path)
+            raise ValueError(f"Cannot store {type(model).__name__} in a bundle: "
+                             f"it needs untrusted types {', '.join(sorted(untrusted))}")
+    return filename, model_format
+
+
+def load_model(source, model_format='xgboost-ubj'):
+    """Load a model written by save_model from a path or the raw file contents"""
+    if model_format == 'xgboost-ubj':
+        return BoosterModel(load_booster(source))
+    contents = read_file(source) if isinstance(source, str) else source
+    if model_format == 'lightgbm-txt':
+        import lightgbm
+
+        return LightGBMModel(lightgbm.Booster(model_str=bytes(contents).decode("utf-8")))
+    if model_format == 'catboost-cbm':
+        import catboost
+
+        return CatBoostModel(catboost.CatBoost().load_model(blob=bytes(contents)))
+    if model_format == 'sklearn-skops':
+        import skops.io
+
+        return skops.io.loads(bytes(contents), trusted=SKOPS_TRUSTED_TYPES)
+    if model_format == 'sklearn-joblib':
+        raise ValueError("Pickled (joblib) models are not loaded from bundles; "
+                         "train the model again to export it with skops")
+    raise ValueError(f"Unknown model format {model_format}")
+
+
+def save_preprocess(path, pipeline):
+    """Write a pipeline's preprocessing arrays to an .npz file"""
+    np.savez(
+        path,
+        mean=pipeline.mean,
+        scale=pipeline.scale,
+        powers=pipeline.powers,
+        input_features=np.array(pipeline.input_features, dtype=str),
+        passthrough_features=np.array(pipeline.passthrough_features, dtype=str),
+        poly_features=np.array(pipeline.poly_features, dtype=str),
+        classes=np.array(pipeline.classes, dtype=str),
+    )
+
+
+def load_preprocess(source):
+    """Read preprocessing arrays written by save_preprocess (path or bytes)"""
+    if not isinstance(source, str):
+        source = io.BytesIO(source)
+    with np.load(source, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def pipeline_from_native(name, model_source, preprocess_source, version=None, model_format='xgboost-ubj'):
+    """Build a Pipeline from a native model and a preprocess .npz"""
+    arrays = load_preprocess(preprocess_source)
+    return Pipeline(
+        name, load_model(model_source, model_format), arrays['classes'],
+        input_features=arrays['input_features'],
+        mean=arrays['mean'],
+        scale=arrays['scale'],
+        powers=arrays['powers'],
+        passthrough_features=arrays['passthrough_features'],
+        poly_features=arrays['poly_features'],
+        version=version,
+    )
+
+
+def load_native_pipeline(name, base_dir=BASE_DIR):
+    """Load a pipeline from its native .ubj model and .npz preprocess bundle"""
+    return pipeline_from_native(
+        name,
+        os.path.join(base_dir, NATIVE_MODEL_FILE.format(name=name)),
+        os.path.join(base_dir, NATIVE_PREPROCESS_FILE.format(name=name)),
+    )
+
+
+def has_native(name, base_dir=BASE_DIR):
+    return all(
+        os.path.exists(os.path.join(base_dir, pattern.format(name=name)))
+        for pattern in (NATIVE_MODEL_FILE, NATIVE_PREPROCESS_FILE)
+    )
+
+
+def load_pipeline(name, base_dir=BASE_DIR, bundle_dir=BUNDLE_DIR):
+    """Load the newest bundle of a pipeline, else the loose native files,
+    else the pickles"""
+    bundle_path = find_bundle(name, root=bundle_dir) if bundle_dir else None
+    if bundle_path is not None:
+        return load_bundle(bundle_path)
+    if has_native(name, base_dir):
+        return load_native_pipeline(name, base_dir)
+    return load_pickle_pipeline(name, base_dir)
+
+
+def _json_safe(value):
+    """Convert NumPy scalars/arrays inside metrics into plain JSON types"""
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _json_safe(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_bundle(pipeline, version, root=BUNDLE_DIR, metrics=None, trained=None):
+    """Write a pipeline as bundles/<name>-<version>/ and return its path.
+
+    The bundle is assembled in a temporary directory and renamed into
+    place, so readers never see a half-written bundle.
+    """
+    path = os.path.join(root, f"{pipeline.name}-{version}")
+    if os.path.exists(path):
+        raise FileExistsError(f"Bundle already exists: {path}")
+    os.makedirs(root, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix=f".{pipeline.name}-", dir=root)
+    try:
+        model_file, model_format = save_model(pipeline.model, staging)
+        model_path = os.path.join(staging, model_file)
+        preprocess_path = os.path.join(staging, "preprocess.npz")
+        save_preprocess(preprocess_path, pipeline)
+
+        manifest = {
+            'format_version': BUNDLE_FORMAT_VERSION,
+            'name': pipeline.name,
+            'version': str(version),
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'trained': trained,
+            'classes': [str(c) for c in pipeline.classes],
+            'input_features': list(pipeline.input_features),
+            'passthrough_features': list(pipeline.passthrough_features),
+            'poly_features': list(pipeline.poly_features),
+            'derived_features': {
+                feature: formula for feature, formula in DERIVED_FEATURE_FORMULAS.items()
+                if feature in pipeline.input_features
+            },
+            'files': {
+                'model': {'path': model_file, 'format': model_format,
+                          'sha256': file_sha256(model_path), 'bytes': os.path.getsize(model_path)},
+                'preprocess': {'path': "preprocess.npz", 'format': "npz",
+                               'sha256': file_sha256(preprocess_path), 'bytes': os.path.getsize(preprocess_path)},
+            },
+            'metrics': _json_safe(metrics or {}),
+            'load_hints': {
+                'model_input_width': pipeline.kernel.n_output,
+                'warmup_rows': 1,
+                'verify_checksums': True,
+            },
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        os.rename(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return path
+
+
+def read_manifest(path):
+    """Read and sanity-check the manifest of a bundle directory"""
+    with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format_version')} in {path}")
+    return manifest
+
+
+def list_bundles(root=BUNDLE_DIR, name=None):
+    """Manifests of all bundles under root (oldest first), reading only the
+    manifest files"""
+    if not os.path.isdir(root):
+        return []
+    manifests = []
+    for entry in os.scandir(root):
+        if entry.name.startswith(".") or not os.path.exists(os.path.join(entry.path, MANIFEST_FILE)):
+            continue
+        manifest = read_manifest(entry.path)
+        if name is None or manifest['name'] == name:
+            manifest['path'] = entry.path
+            manifests.append(manifest)
+    return sorted(manifests, key=lambda m: (m['created'], m['version']))
+
+
+def find_bundle(name, version=None, root=BUNDLE_DIR):
+    """Path of the named bundle version, or of the newest one if version is None"""
+    manifests = list_bundles(root, name)
+    if version is not None:
+        manifests = [m for m in manifests if m['version'] == str(version)]
+    return manifests[-1]['path'] if manifests else None
+
+
+def latest_bundle_version(name, root=BUNDLE_DIR):
+    """Version of the bundle load_pipeline would pick, or None without bundles"""
+    manifests = list_bundles(root, name)
+    return manifests[-1]['version'] if manifests else None
+
+
+def load_bundle(path, verify=None):
+    """Load and validate a bundle, reading each file exactly once"""
+    manifest = read_manifest(path)
+    hints = manifest.get('load_hints', {})
+    if verify is None:
+        verify = hints.get('verify_checksums', True)
+
+    contents = {}
+    for key, entry in manifest['files'].items():
+        contents[key] = read_file(
+            os.path.join(path, entry['path']),
+            expected_sha256=entry['sha256'] if verify else None,
+        )
+
+    pipeline = pipeline_from_native(
+        manifest['name'], contents['model'], contents['preprocess'], version=manifest['version'],
+        model_format=manifest['files']['model'].get('format', 'xgboost-ubj'),
+    )
+    if pipeline.input_features != manifest['input_features']:
+        raise ValueError(f"Feature order in {path} does not match its manifest")
+    if pipeline.kernel.n_output != hints.get('model_input_width', pipeline.kernel.n_output):
+        raise ValueError(f"Model input width in {path} does not match its manifest")
+
+    # Run one row through the model so the first real request is not slow
+    if hints.get('warmup_rows'):
+        pipeline.predict(np.tile(pipeline.mean, (hints['warmup_rows'], 1)))
+    return pipeline
+
+
+def promote_bundle(path, root=BUNDLE_DIR):
+    """Copy a bundle (e.g. a Research page training run) into root so the
+    classification pages serve it; returns the new path.
+
+    The copy's ``created`` time is the promotion time, which makes it the
+    newest bundle of its pipeline.
+    """
+    manifest = read_manifest(path)
+    target = os.path.join(root, f"{manifest['name']}-{manifest['version']}")
+    if os.path.exists(target):
+        raise FileExistsError(f"Bundle already exists: {target}")
+    os.makedirs(root, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix=f".{manifest['name']}-", dir=root)
+    try:
+        for entry in manifest['files'].values():
+            shutil.copyfile(os.path.join(path, entry['path']), os.path.join(staging, entry['path']))
+        manifest.pop('path', None)
+        manifest['created'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        manifest['promoted_from'] = os.path.abspath(path)
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return target
+
+
+def export_native(name, base_dir=BASE_DIR):
+    """Convert the pickled pipeline into the native .ubj + .npz files"""
+    pipeline = load_pickle_pipeline(name, base_dir)
+    booster = pipeline.model.get_booster()
+    model_path = os.path.join(base_dir, NATIVE_MODEL_FILE.format(name=name))
+    preprocess_path = os.path.join(base_dir, NATIVE_PREPROCESS_FILE.format(name=name))
+    booster.save_model(model_path)
+    save_preprocess(preprocess_path, pipeline)
+    return model_path, preprocess_path
+
+
+def has_pickles(name, base_dir=BASE_DIR):
+    return all(os.path.exists(os.path.join(base_dir, f)) for f in PIPELINE_FILES[name].values())
+
+
+def check_sklearn_equivalence(name, base_dir=BASE_DIR, bundle_dir=BUNDLE_DIR, n_rows=2000, seed=0):
+    """Compare the array pipelines with the original pickled sklearn chain.
+
+    Scores random rows spread like the training data through the pipeline
+    built from the pickles and, if it has the same preprocessing, the one
+    load_pipeline serves.  Returns {source: (model input identical,
+    largest probability difference)}; both must be (True, 0.0).
+    """
+    files = PIPELINE_FILES[name]
+    scaler = _load_pickle(base_dir, files['scaler'])
+    poly = _load_pickle(base_dir, files['poly'])
+    model = _load_pickle(base_dir, files['model'])
+    reference = load_pickle_pipeline(name, base_dir)
+
+    rng = np.random.default_rng(seed)
+    X = scaler.mean_ + scaler.scale_ * rng.standard_normal((n_rows, len(reference.input_features)))
+    expected = sklearn_transform(
+        scaler, poly, X,
+        passthrough_idx=[reference.feature_index[f] for f in reference.passthrough_features],
+        poly_idx=[reference.feature_index[f] for f in reference.poly_features],
+    )
+    expected_probabilities = model.predict_proba(expected)
+
+    pipelines = {'pickle': reference}
+    served = load_pipeline(name, base_dir, bundle_dir)
+    if (served.input_features == reference.input_features
+            and np.array_equal(served.powers, reference.powers)
+            and np.array_equal(served.mean, reference.mean)):
+        pipelines[served.version or 'served'] = served
+
+    results = {}
+    for source, pipeline in pipelines.items():
+        transformed = pipeline.transform(X)
+        difference = np.abs(pipeline.model.predict_proba(transformed) - expected_probabilities).max()
+        results[source] = (bool(np.array_equal(transformed, expected)), float(difference))
+    return results
+
+
+def bundle_from_artifacts(name, version, base_dir=BASE_DIR, root=BUNDLE_DIR, trained=None):
+    """Package the loose artifacts of a pipeline (and its metrics) as a bundle.
+
+    When the pickles are present, the pipeline must first reproduce their
+    sklearn chain exactly.
+    """
+    if has_pickles(name, base_dir):
+        for source, (identical, difference) in check_sklearn_equivalence(name, base_dir, bundle_dir=None).items():
+            if not identical or difference:
+                raise ValueError(f"The {source} {name} pipeline differs from the sklearn chain "
+                                 f"(probabilities by up to {difference:g})")
+    pipeline = load_pipeline(name, base_dir, bundle_dir=None)
+    metrics_file = f"model_metrics_{name}.pkl"
+    metrics = None
+    if os.path.exists(os.path.join(base_dir, metrics_file)):
+        metrics = _load_pickle(base_dir, metrics_file)
+    return write_bundle(pipeline, version, root=root, metrics=metrics, trained=trained)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage pipeline artifacts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export pickles to the native format")
+    export_parser.add_argument("pipeline", choices=sorted(PIPELINE_FILES))
+    bundle_parser = subparsers.add_parser("bundle", help="Package loose artifacts as a versioned bundle")
+    bundle_parser.add_argument("pipeline", choices=sorted(PIPELINE_FILES))
+    bundle_parser.add_argument("--version", required=True)
+    bundle_parser.add_argument("--trained", help="Training timestamp to record in the manifest")
+    subparsers.add_parser("list", help="List available bundles")
+    promote_parser = subparsers.add_parser("promote", help="Copy a training run bundle into bundles/")
+    promote_parser.add_argument("path")
+    subparsers.add_parser("check", help="Verify the pipelines reproduce the pickled sklearn chain exactly")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        for path in export_native(args.pipeline):
+            print(f"Wrote {path}")
+    elif args.command == "bundle":
+        path = bundle_from_artifacts(args.pipeline, args.version, trained=args.trained)
+        print(f"Wrote {path}")
+    elif args.command == "list":
+        for manifest in list_bundles():
+            print(f"{manifest['name']:<12} {manifest['version']:<12} {manifest['created']}  {manifest['path']}")
+    elif args.command == "promote":
+        print(f"Wrote {promote_bundle(args.path)}")
+    elif args.command == "check":
+        failed = False
+        for name in PIPELINE_FILES:
+            if not has_pickles(name):
+                print(f"{name:<12} skipped: pickled artifacts not found")
+                continue
+            for source, (identical, difference) in check_sklearn_equivalence(name).items():
+                ok = identical and not difference
+                failed = failed or not ok
+                print(f"{name:<12} {source:<12} model input {'identical' if identical else 'DIFFERS'}, "
+                      f"max probability difference {difference:g}")
+        if failed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Benchmark matrix of the Research page algorithms on the KOI dataset.
+
+Every algorithm is trained with fixed seeds on the same stratified split
+of the cached training data (see datasets.py), each in a fresh process so
+its peak memory is its own.  Per model the suite records fit time,
+held-out accuracy, single-row predict latency (p50/p99), batch
+throughput, peak resident memory and the size and format of the model
+file a bundle ships (see artifacts.save_model), and writes a Markdown
+report plus the raw numbers as JSON.  Passing an earlier JSON
+report as ``--baseline`` adds a comparison table, so the suite can be
+re-run after code changes.
+
+Usage:
+    python benchmark.py --output reports/benchmark.md
+    python benchmark.py --algorithms XGBoost LightGBM --n-estimators 200 --baseline reports/benchmark.json
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import datasets
+import training
+from artifacts import file_sha256, save_model
+
+# Hyperparameters benchmarked per algorithm: the Research page form defaults
+BENCHMARK_PARAMS = {
+    'Random Forest': {'n_estimators': 1000, 'max_depth': 8, 'min_samples_split': 2,
+                      'min_samples_leaf': 1, 'max_features': 'sqrt'},
+    'XGBoost': {'n_estimators': 1000, 'max_depth': 8, 'learning_rate': 0.1, 'subsample': 0.8,
+                'colsample_bytree': 0.8, 'gamma': 0.1},
+    'LightGBM': {'n_estimators': 1000, 'max_depth': 8, 'learning_rate': 0.05, 'num_leaves': 31,
+                 'subsample': 0.8, 'colsample_bytree': 0.8},
+    'CatBoost': {'n_estimators': 1000, 'depth': 8, 'learning_rate': 0.05, 'l2_leaf_reg': 3.0},
+    'AdaBoost': {'n_estimators': 500, 'learning_rate': 0.1, 'algorithm': 'SAMME'},
+    'Gradient Boosting': {'n_estimators': 500, 'max_depth': 5, 'learning_rate': 0.1, 'max_features': 0.8},
+}
+
+# Single-row predictions timed per model, after a few untimed warm-up calls
+LATENCY_CALLS = 200
+WARMUP_CALLS = 10
+
+# Batch predictions are repeated until at least this many seconds have passed
+THROUGHPUT_SECONDS = 1.0
+
+# Columns of the report table: key -> (header, format)
+REPORT_COLUMNS = {
+    'accuracy': ("Accuracy", "{:.4f}"),
+    'fit_seconds': ("Fit (s)", "{:.2f}"),
+    'latency_p50_ms': ("Predict p50 (ms)", "{:.3f}"),
+    'latency_p99_ms': ("Predict p99 (ms)", "{:.3f}"),
+    'throughput_rows_per_sec': ("Batch (rows/s)", "{:,.0f}"),
+    'peak_rss_mb': ("Peak RSS (MB)", "{:.0f}"),
+    'fit_memory_mb': ("Fit memory (MB)", "{:.0f}"),
+    'model_size_mb': ("Model size (MB)", "{:.2f}"),
+    'model_format': ("Model format", "{}"),
+}
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory, in MB"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def time_single_row(model, X):
+    """p50 and p99 latency in ms of predict_proba on one row at a time"""
+    rows = [X[i % len(X)][None, :] for i in range(WARMUP_CALLS + LATENCY_CALLS)]
+    for row in rows[:WARMUP_CALLS]:
+        model.predict_proba(row)
+    latencies = []
+    for row in rows[WARMUP_CALLS:]:
+        start_time = time.perf_counter()
+        model.predict_proba(row)
+        latencies.append(time.perf_counter() - start_time)
+    return np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+def time_batch(model, X):
+    """Rows per second of predict_proba on the whole held-out matrix"""
+    model.predict_proba(X)
+    rows, start_time = 0, time.perf_counter()
+    while True:
+        model.predict_proba(X)
+        rows += len(X)
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= THROUGHPUT_SECONDS:
+            return rows / elapsed
+
+
+def model_size_mb(model):
+    """Size in MB and format of the model file save_model writes for a bundle"""
+    with tempfile.TemporaryDirectory() as directory:
+        filename, model_format = save_model(model, directory)
+        return os.path.getsize(os.path.join(directory, filename)) / 1024 ** 2, model_format
+
+
+def benchmark_algorithm(algorithm, params, csv_path, n_jobs):
+    """Train and measure one algorithm; runs in its own process"""
+    X, y, classes = datasets.load_training_data(csv_path)
+    X_train, X_test, y_train, y_test, _ = training.split_and_scale(X, y)
+    memory_before_fit = peak_rss_mb()
+
+    start_time = time.perf_counter()
+    model = training.TRAINERS[algorithm](X_train, y_train, X_test, y_test, params, n_jobs=n_jobs)
+    fit_seconds = time.perf_counter() - start_time
+    peak_after_fit = peak_rss_mb()
+
+    p50, p99 = time_single_row(model, X_test)
+    size_mb, model_format = model_size_mb(model)
+    return {
+        'algorithm': algorithm,
+        'params': dict(params),
+        'accuracy': float(training.evaluate(model, X_test, y_test, classes)['accuracy']),
+        'fit_seconds': fit_seconds,
+        'latency_p50_ms': float(p50),
+        'latency_p99_ms': float(p99),
+        'throughput_rows_per_sec': time_batch(model, X_test),
+        'peak_rss_mb': peak_rss_mb(),
+        'fit_memory_mb': max(peak_after_fit - memory_before_fit, 0.0),
+        'model_size_mb': size_mb,
+        'model_format': model_format,
+    }
+
+
+def run_benchmarks(algorithms, csv_path=datasets.KOI_DATASET, n_jobs=-1, n_estimators=None):
+    """Benchmark results per algorithm, skipping ones whose package is missing"""
+    # Parse the CSV once up front so no benchmark process pays for it
+    datasets.load_training_data(csv_path)
+    context = multiprocessing.get_context("spawn")
+    results, skipped = [], {}
+    for algorithm in algorithms:
+        package = training.missing_package(algorithm)
+        if package:
+            skipped[algorithm] = f"{package} is not installed"
+            print(f"Skipping {algorithm}: {skipped[algorithm]}")
+            continue
+        params = dict(BENCHMARK_PARAMS[algorithm])
+        if n_estimators:
+            params['n_estimators'] = n_estimators
+        print(f"Benchmarking {algorithm} ...", flush=True)
+        with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+            result = executor.submit(benchmark_algorithm, algorithm, params, csv_path, n_jobs).result()
+        print(f"  accuracy {result['accuracy']:.4f}, fit {result['fit_seconds']:.2f} s, "
+              f"p50 {result['latency_p50_ms']:.3f} ms", flush=True)
+        results.append(result)
+    return results, skipped
+
+
+def environment(csv_path, n_jobs):
+    """Machine, library versions and dataset the numbers were measured with"""
+    versions = {}
+    for package in ('numpy', 'sklearn', 'xgboost', 'lightgbm', 'catboost'):
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            pass
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'n_jobs': n_jobs,
+        'versions': versions,
+        'dataset': os.path.basename(csv_path),
+        'dataset_sha256': file_sha256(csv_path),
+        'test_size': training.TEST_SIZE,
+        'random_state': training.RANDOM_STATE,
+    }
+
+
+def _table(header, rows):
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(row) + " |" for row in rows]
+    return lines
+
+
+def format_report(report, baseline=None):
+    """Markdown comparison of the benchmark results"""
+    env = report['environment']
+    lines = [
+        "# Algorithm benchmark",
+        "",
+        f"{env['date']} · Python {env['python']} · {env['cpus']} CPUs (n_jobs={env['n_jobs']}) · "
+        + ", ".join(f"{name} {version}" for name, version in env['versions'].items()),
+        "",
+        f"Dataset `{env['dataset']}` (sha256 {env['dataset_sha256'][:12]}), "
+        f"stratified {1 - env['test_size']:.0%}/{env['test_size']:.0%} split, random_state {env['random_state']}.",
+        "",
+    ]
+    lines += _table(
+        ["Algorithm"] + [header for header, _ in REPORT_COLUMNS.values()],
+        [[result['algorithm']] + [fmt.format(result[key]) for key, (_, fmt) in REPORT_COLUMNS.items()]
+         for result in report['results']],
+    )
+    for algorithm, reason in report['skipped'].items():
+        lines.append(f"\n{algorithm} skipped: {reason}")
+
+    if baseline:
+        previous = {result['algorithm']: result for result in baseline['results']}
+        rows = []
+        for result in report['results']:
+            old = previous.get(result['algorithm'])
+            if old is None:
+                continue
+            rows.append([
+                result['algorithm'],
+                f"{result['accuracy'] - old['accuracy']:+.4f}",
+                f"{result['fit_seconds'] / old['fit_seconds']:.2f}x",
+                f"{result['latency_p50_ms'] / old['latency_p50_ms']:.2f}x",
+                f"{result['throughput_rows_per_sec'] / old['throughput_rows_per_sec']:.2f}x",
+                f"{result['model_size_mb'] / old['model_size_mb']:.2f}x",
+            ])
+        lines += ["", f"## Compared with {baseline['environment']['date']}", ""]
+        lines += _table(["Algorithm", "Accuracy Δ", "Fit time", "Predict p50", "Batch throughput", "Model size"], rows)
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Research page algorithms")
+    parser.add_argument("--csv", default=datasets.KOI_DATASET, help="KOI CSV to train on")
+    parser.add_argument("--algorithms", nargs="+", choices=list(BENCHMARK_PARAMS), default=list(BENCHMARK_PARAMS))
+    parser.add_argument("--n-estimators", type=int, help="Override the number of trees/rounds for a quick run")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Threads per fit; -1 uses every core")
+    parser.add_argument("--output", default="benchmark-report.md",
+                        help="Markdown report; the raw numbers go next to it as .json")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results, skipped = run_benchmarks(args.algorithms, args.csv, args.n_jobs, args.n_estimators)
+    report = {'environment': environment(args.csv, args.n_jobs), 'results': results, 'skipped': skipped}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        f.write(format_report(report, baseline))
+    with open(os.path.splitext(args.output)[0] + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Micro-batching of concurrent online predictions.
+
+Single-object requests that arrive within a few milliseconds of each other
+are stacked into one matrix and scored with one ``predict_proba`` call, so
+XGBoost walks its trees once per batch instead of once per request.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import threading
+
+import numpy as np
+
+
+class BatcherClosed(RuntimeError):
+    """Raised by a closed MicroBatcher; the caller scores the rows directly"""
+
+
+class MicroBatcher:
+    """Gathers rows for up to ``max_wait_ms`` or ``max_batch_size`` rows,
+    runs ``predict_fn`` once and fans the result rows back out.
+
+    ``predict_fn`` takes an (n, n_features) matrix and returns an (n, k)
+    array.  The model runs on a dedicated thread, so the next batch keeps
+    filling while the current one is scored.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._batch_sizes = collections.Counter()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    async def predict(self, X):
+        """Score the rows of X as part of the next batch.
+
+        Raises BatcherClosed once close() has run: rows queued after the
+        stop sentinel would never be scored.
+        """
+        if self.closed:
+            raise BatcherClosed("The batcher has been closed")
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        # No await between the closed check and the put, so a row is either
+        # refused or queued ahead of the sentinel
+        self._queue.put_nowait((np.atleast_2d(X), future))
+        return await future
+
+    async def close(self):
+        """Stop once the rows queued so far are scored (await on the batcher's loop)"""
+        self.closed = True
+        if self._worker is None:
+            self._executor.shutdown(wait=False)
+        else:
+            self._queue.put_nowait(None)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is None:
+                break
+            pending = [item]
+            n_rows = len(item[0])
+            deadline = loop.time() + self.max_wait
+
+            while n_rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            batch = np.vstack([rows for rows, _ in pending])
+            try:
+                result = await loop.run_in_executor(self._executor, self.predict_fn, batch)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+            start = 0
+            for rows, future in pending:
+                if not future.done():
+                    future.set_result(result[start:start + len(rows)])
+                start += len(rows)
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        """Batch count, rows scored and a power-of-two batch-size histogram"""
+        with self._lock:
+            sizes = dict(self._batch_sizes)
+        histogram = collections.Counter()
+        for size, count in sizes.items():
+            low = 1 << (size.bit_length() - 1)
+            label = str(low) if low == 1 else f"{low}-{2 * low - 1}"
+            histogram[label] += count
+        batches = sum(sizes.values())
+        rows = sum(size * count for size, count in sizes.items())
+        return {
+            'batches': batches,
+            'rows': rows,
+            'mean_batch_size': rows / batches if batches else 0.0,
+            'histogram': dict(sorted(histogram.items(), key=lambda item: int(item[0].split("-")[0]))),
+        }
+
+
+class BackgroundLoop:
+    """An asyncio event loop on a daemon thread, for use from threaded code"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine, timeout=None):
+        """Run a coroutine on the loop and block until it finishes"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
@@ -0,0 +1,178 @@
+"""Training data for the Research page, parsed once per file content.
+
+The KOI CSV is pruned, extended with the derived features and imputed
+once; the result is stored next to the app under ``.cache/`` keyed by the
+SHA-256 of the CSV, so later training runs only read a columnar file.
+
+Stratified k-fold splits are precomputed the same way: per-fold scaled
+matrices are written once as .npy files and memory-mapped by every
+cross-validation job, whatever the algorithm or hyperparameters.
+
+Usage:
+    python datasets.py [cumulative.csv]    # build the cache ahead of time
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import BASE_DIR, file_sha256
+from features import add_derived_features
+
+KOI_DATASET = os.path.join(BASE_DIR, "cumulative_2025.10.02_20.38.17.csv")
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "datasets")
+
+# Bump whenever prepare_training_data changes, so old cache files are ignored
+PREPARATION_VERSION = 1
+
+TARGET_COLUMN = 'koi_disposition'
+
+# Default number of cross-validation folds and their shuffling seed
+CV_FOLDS = 5
+CV_RANDOM_STATE = 42
+
+# Identifiers, free text and leakage-prone columns never used for training
+DROP_COLUMNS = ["koi_longp", "koi_ingress", "koi_model_dof", "koi_model_chisq",
+                "koi_sage", "rowid", "kepoi_name", "kepid", "kepler_name",
+                "koi_pdisposition", "koi_score", "koi_time0bk", "koi_comment",
+                "koi_limbdark_mod", "koi_parm_prov", "koi_trans_mod",
+                "koi_datalink_dvr", "koi_datalink_dvs", "koi_tce_delivname",
+                "koi_sparprov", "koi_vet_stat", "koi_vet_date", "koi_disp_prov",
+                "koi_ldm_coeff3", "koi_ldm_coeff4"]
+
+
+def prepare_training_data(df):
+    """Numeric feature frame (median-imputed) and disposition labels"""
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    df = add_derived_features(df)
+    numerical_features = [
+        col for col in df.select_dtypes(include=['float64', 'int64']).columns
+        if col != TARGET_COLUMN
+    ]
+    X = df[numerical_features].fillna(df[numerical_features].median())
+    return X, df[TARGET_COLUMN].to_numpy(dtype=str)
+
+
+def encode_labels(labels):
+    """Sorted class names and integer codes, as LabelEncoder would give"""
+    classes, y = np.unique(labels, return_inverse=True)
+    return classes, y
+
+
+def cache_path(digest, cache_dir=CACHE_DIR):
+    """Cache file for a dataset digest, without extension"""
+    return os.path.join(cache_dir, f"{digest[:16]}-v{PREPARATION_VERSION}")
+
+
+def _write_cache(path, X, labels):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        target, tmp = path + ".npz", path + ".tmp.npz"
+        np.savez(tmp, X=X.to_numpy(), columns=np.asarray(X.columns, dtype=str), labels=labels)
+    else:
+        target, tmp = path + ".parquet", path + ".tmp.parquet"
+        X.assign(**{TARGET_COLUMN: labels}).to_parquet(tmp, index=False)
+    # Rename into place so a concurrent reader never sees a partial file
+    os.replace(tmp, target)
+
+
+def _read_cache(path):
+    """(X, labels) from a cache file, or None if there is none"""
+    if os.path.exists(path + ".parquet"):
+        frame = pd.read_parquet(path + ".parquet")
+        return frame, frame.pop(TARGET_COLUMN).to_numpy(dtype=str)
+    if os.path.exists(path + ".npz"):
+        with np.load(path + ".npz") as data:
+            return pd.DataFrame(data['X'], columns=data['columns']), data['labels']
+    return None
+
+
+def load_training_data(path=KOI_DATASET, cache_dir=CACHE_DIR):
+    """Feature frame X, encoded labels y and class names for a KOI CSV.
+
+    The CSV is only parsed when no cache file exists for its content.
+    """
+    cached_path = cache_path(file_sha256(path), cache_dir)
+    cached = _read_cache(cached_path)
+    if cached is None:
+        cached = prepare_training_data(pd.read_csv(path))
+        _write_cache(cached_path, *cached)
+    X, labels = cached
+    classes, y = encode_labels(labels)
+    return X, y, classes
+
+
+def write_cv_folds(folds_dir, X, y, classes, n_splits=CV_FOLDS):
+    """Scale each stratified fold with a scaler fitted on its training part
+    and store the four matrices per fold as .npy files"""
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.preprocessing import StandardScaler
+
+    parent = os.path.dirname(folds_dir)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".folds-", dir=parent)
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=CV_RANDOM_STATE)
+    for fold, (train_idx, test_idx) in enumerate(splitter.split(X, y)):
+        scaler = StandardScaler()
+        arrays = {
+            'X_train': scaler.fit_transform(X[train_idx]),
+            'X_test': scaler.transform(X[test_idx]),
+            'y_train': y[train_idx],
+            'y_test': y[test_idx],
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"fold{fold}_{name}.npy"), array)
+    np.save(os.path.join(staging, "classes.npy"), np.asarray(classes, dtype=str))
+    try:
+        os.rename(staging, folds_dir)
+    except OSError:
+        # Another process finished the same folds first
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_cv_folds(path=KOI_DATASET, n_splits=CV_FOLDS, cache_dir=CACHE_DIR):
+    """Directory holding the scaled cross-validation folds of a KOI CSV,
+    built on first use"""
+    folds_dir = f"{cache_path(file_sha256(path), cache_dir)}-cv{n_splits}"
+    if not os.path.exists(os.path.join(folds_dir, "classes.npy")):
+        X, y, classes = load_training_data(path, cache_dir)
+        write_cv_folds(folds_dir, X, y, classes, n_splits)
+    return folds_dir
+
+
+def count_cv_folds(folds_dir):
+    return sum(1 for name in os.listdir(folds_dir) if name.endswith("_y_test.npy"))
+
+
+def read_cv_classes(folds_dir):
+    return np.load(os.path.join(folds_dir, "classes.npy"))
+
+
+def read_cv_fold(folds_dir, fold):
+    """X_train, X_test, y_train, y_test of one fold, memory-mapped read-only"""
+    return tuple(
+        np.load(os.path.join(folds_dir, f"fold{fold}_{name}.npy"), mmap_mode='r')
+        for name in ('X_train', 'X_test', 'y_train', 'y_test')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the training data cache")
+    parser.add_argument("csv", nargs="?", default=KOI_DATASET)
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    X, y, classes = load_training_data(args.csv)
+    print(f"{X.shape[0]} rows x {X.shape[1]} features, classes {list(classes)} "
+          f"({time.perf_counter() - start_time:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Derived KOI features shared by the classification pipelines.
+
+Every function here works on scalars as well as NumPy arrays / pandas
+columns, so the interactive form, the batch scorer and the training code
+compute exactly the same values.
+
+The engineered columns of the multi-class model were reconstructed from
+their names and the training scaler statistics (e.g. ``period_squared`` and
+``steff_squared`` match E[x^2] of the raw columns exactly); the threshold
+features (``*_snr``, ``*habitable_zone``) are the closest round cut-offs to
+the training class fractions.
+"""
+import numpy as np
+import pandas as pd
+
+# Human readable formulas, kept next to the code that implements them
+DERIVED_FEATURE_FORMULAS = {
+    'earth_similarity': '1 / (1 + |koi_prad - 1| + |koi_teq - 288| / 100)',
+    'log_snr': 'log(1 + koi_model_snr)',
+    'temp_period_ratio': 'koi_teq / koi_period',
+    'temp_period_product': 'koi_teq * koi_period',
+    'planet_star_radius_ratio': 'koi_prad / koi_srad',
+    'radius_difference': 'koi_prad - koi_srad',
+    'log_period': 'log(1 + koi_period)',
+    'sqrt_period': 'sqrt(koi_period)',
+    'period_squared': 'koi_period^2',
+    'inv_period': '1 / koi_period',
+    'log_depth': 'log(1 + koi_depth)',
+    'sqrt_depth': 'sqrt(koi_depth)',
+    'duration_period_ratio': 'koi_duration / koi_period',
+    'duration_period_product': 'koi_duration * koi_period',
+    'log_steff': 'log(1 + koi_steff)',
+    'steff_squared': 'koi_steff^2',
+    'logg_radius_interaction': 'koi_slogg * koi_srad',
+    'stellar_density_proxy': 'koi_smass / koi_srad^3',
+    'log_slogg': 'log(1 + koi_slogg + 10)',
+    'impact_squared': 'koi_impact^2',
+    'impact_sqrt': 'sqrt(koi_impact)',
+    'impact_cubed': 'koi_impact^3',
+    'log_insol': 'log(1 + koi_insol)',
+    'sqrt_insol': 'sqrt(koi_insol)',
+    'habitable_zone': '180 <= koi_teq <= 500',
+    'conservative_hz': '200 <= koi_teq <= 400',
+    'high_snr': 'koi_model_snr > 100',
+    'very_high_snr': 'koi_model_snr > 200',
+    'snr_squared': 'koi_model_snr^2',
+    'earth_like_proxy': 'earth_similarity * habitable_zone',
+    'depth_duration_ratio': 'koi_depth / koi_duration',
+    'radius_period_ratio': 'koi_prad / koi_period',
+}
+
+
+def earth_similarity(koi_prad, koi_teq):
+    """Earth Similarity Index from planet radius (Earth radii) and temperature (K)"""
+    return 1 / (1 + np.abs(koi_prad - 1) + np.abs(koi_teq - 288) / 100)
+
+
+def log_snr(koi_model_snr):
+    """Log-compressed transit signal-to-noise ratio"""
+    return np.log1p(koi_model_snr)
+
+
+def log_slogg(koi_slogg):
+    """Log surface gravity, offset so that it stays positive"""
+    return np.log1p(koi_slogg + 10)
+
+
+def stellar_density_proxy(koi_smass, koi_srad):
+    """Mean stellar density in solar units"""
+    return koi_smass / koi_srad ** 3
+
+
+def habitable_zone(koi_teq):
+    """1 for equilibrium temperatures in the optimistic habitable zone"""
+    return (koi_teq >= 180) & (koi_teq <= 500)
+
+
+def conservative_hz(koi_teq):
+    """1 for equilibrium temperatures in the conservative habitable zone"""
+    return (koi_teq >= 200) & (koi_teq <= 400)
+
+
+# feature -> (inputs, function), in dependency order.  NumPy ufuncs write
+# straight into the output block; other functions return a new array.
+DERIVED_FEATURES = {
+    'earth_similarity': (('koi_prad', 'koi_teq'), earth_similarity),
+    'log_snr': (('koi_model_snr',), np.log1p),
+    'temp_period_ratio': (('koi_teq', 'koi_period'), np.divide),
+    'temp_period_product': (('koi_teq', 'koi_period'), np.multiply),
+    'planet_star_radius_ratio': (('koi_prad', 'koi_srad'), np.divide),
+    'radius_difference': (('koi_prad', 'koi_srad'), np.subtract),
+    'log_period': (('koi_period',), np.log1p),
+    'sqrt_period': (('koi_period',), np.sqrt),
+    'period_squared': (('koi_period',), np.square),
+    'inv_period': (('koi_period',), np.reciprocal),
+    'log_depth': (('koi_depth',), np.log1p),
+    'sqrt_depth': (('koi_depth',), np.sqrt),
+    'duration_period_ratio': (('koi_duration', 'koi_period'), np.divide),
+    'duration_period_product': (('koi_duration', 'koi_period'), np.multiply),
+    'log_steff': (('koi_steff',), np.log1p),
+    'steff_squared': (('koi_steff',), np.square),
+    'logg_radius_interaction': (('koi_slogg', 'koi_srad'), np.multiply),
+    'stellar_density_proxy': (('koi_smass', 'koi_srad'), stellar_density_proxy),
+    'log_slogg': (('koi_slogg',), log_slogg),
+    'impact_squared': (('koi_impact',), np.square),
+    'impact_sqrt': (('koi_impact',), np.sqrt),
+    'impact_cubed': (('koi_impact',), lambda b: b ** 3),
+    'log_insol': (('koi_insol',), np.log1p),
+    'sqrt_insol': (('koi_insol',), np.sqrt),
+    'habitable_zone': (('koi_teq',), habitable_zone),
+    'conservative_hz': (('koi_teq',), conservative_hz),
+    'high_snr': (('koi_model_snr',), lambda snr: snr > 100),
+    'very_high_snr': (('koi_model_snr',), lambda snr: snr > 200),
+    'snr_squared': (('koi_model_snr',), np.square),
+    'earth_like_proxy': (('earth_similarity', 'habitable_zone'), np.multiply),
+    'depth_duration_ratio': (('koi_depth', 'koi_duration'), np.divide),
+    'radius_period_ratio': (('koi_prad', 'koi_period'), np.divide),
+}
+
+
+def _plan(columns, wanted=None):
+    """Derived features that are absent from columns but computable.
+
+    With ``wanted`` only those features and the ones they depend on are kept.
+    """
+    available = set(columns)
+    planned = []
+    for feature, (inputs, _) in DERIVED_FEATURES.items():
+        if feature not in available and all(i in available for i in inputs):
+            planned.append(feature)
+            available.add(feature)
+    if wanted is None:
+        return planned
+
+    needed = set(wanted)
+    for feature in reversed(planned):
+        if feature in needed:
+            needed.update(DERIVED_FEATURES[feature][0])
+    return [feature for feature in planned if feature in needed]
+
+
+def required_inputs(wanted):
+    """Raw columns that the ``wanted`` features are computed from.
+
+    Raw (non-derived) names in wanted are returned as they are.
+    """
+    required = set()
+    pending = list(wanted)
+    while pending:
+        feature = pending.pop()
+        if feature in DERIVED_FEATURES:
+            pending.extend(DERIVED_FEATURES[feature][0])
+        else:
+            required.add(feature)
+    return required
+
+
+def _compute(planned, column, block):
+    """Fill block[j] with planned[j]; column(name) returns a float array"""
+    computed = {}
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for j, feature in enumerate(planned):
+            inputs, function = DERIVED_FEATURES[feature]
+            args = [computed[i] if i in computed else column(i) for i in inputs]
+            if isinstance(function, np.ufunc):
+                function(*args, out=block[j])
+            else:
+                block[j] = function(*args)
+            computed[feature] = block[j]
+    # Division by zero and logs of negatives are imputed like missing values
+    block[~np.isfinite(block)] = np.nan
+
+
+def derived_features(data, wanted=None):
+    """Compute every derivable feature missing from data.
+
+    ``data`` is anything with column lookup by name: a DataFrame (values are
+    computed for all rows at once) or a dict holding a single KOI.  Features
+    that are already present or whose raw inputs are missing are skipped;
+    non-finite results are returned as NaN.  ``wanted`` limits the result
+    to the listed features.
+    """
+    if isinstance(data, pd.DataFrame):
+        planned = _plan(data.columns, wanted)
+        block = np.empty((len(planned), len(data)))
+        _compute(planned, lambda c: data[c].to_numpy(dtype=np.float64), block)
+        return dict(zip(planned, block))
+
+    planned = _plan((key for key, value in data.items() if value is not None), wanted)
+    block = np.empty((len(planned), 1))
+    _compute(planned, lambda c: np.float64(data[c]), block)
+    return {feature: float(value) for feature, value in zip(planned, block[:, 0])}
+
+
+def add_derived_features(df, wanted=None):
+    """Return df with every derivable (or every ``wanted``) feature column added.
+
+    All new columns are computed into one preallocated block and joined to
+    df in a single concat.
+    """
+    planned = _plan(df.columns, wanted)
+    if not planned:
+        return df
+    block = np.empty((len(planned), len(df)))
+    _compute(planned, lambda c: df[c].to_numpy(dtype=np.float64), block)
+    return pd.concat([df, pd.DataFrame(block.T, columns=planned, index=df.index)], axis=1)
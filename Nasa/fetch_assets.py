@@ -0,0 +1,76 @@
+"""Download the third-party browser assets the 3D simulation serves itself.
+
+simulation/index.html loads three.js from static/, which Streamlit serves
+at app/static/ (server.enableStaticServing in .streamlit/config.toml, so
+run the app from this directory).  That route sends ETag and
+Last-Modified headers, so browsers revalidate the file instead of fetching
+it again, but Streamlit cannot send a long max-age.  The release is in the
+file name, so the reverse proxy in front of the app can mark these files
+immutable, e.g. for nginx:
+
+    location ~ /app/static/.+-r[0-9]+[.]min[.]js$ {
+        proxy_pass http://127.0.0.1:8501;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+The page falls back to the CDN while the vendored copy is missing.  Run
+this once on a connected machine, record the printed SHA-256 in ASSETS
+and commit both, so air-gapped deployments get a working simulation.
+
+Usage:
+    python fetch_assets.py
+    python fetch_assets.py --force
+"""
+import argparse
+import hashlib
+import os
+import urllib.request
+
+from artifacts import BASE_DIR
+
+VENDOR_DIR = os.path.join(BASE_DIR, "static")
+
+# Vendored file -> (source URL, text that must appear in it, SHA-256 or
+# None while the file has not been vendored and pinned yet)
+ASSETS = {
+    'three-r128.min.js': ("https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js", b'"128"', None),
+}
+
+
+def fetch_asset(filename, url, marker, sha256=None, force=False):
+    """Download one asset into VENDOR_DIR, or verify the existing copy;
+    returns its path and SHA-256"""
+    path = os.path.join(VENDOR_DIR, filename)
+    if os.path.exists(path) and not force:
+        with open(path, "rb") as f:
+            content = f.read()
+    else:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            content = response.read()
+        if marker not in content:
+            raise ValueError(f"{url} does not look like {filename}")
+
+    digest = hashlib.sha256(content).hexdigest()
+    if sha256 is not None and digest != sha256:
+        raise ValueError(f"Checksum mismatch for {filename}: expected {sha256}, got {digest}")
+    if not os.path.exists(path) or force:
+        os.makedirs(VENDOR_DIR, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    return path, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vendor the simulation's browser libraries")
+    parser.add_argument("--force", action="store_true", help="Download again even if the file exists")
+    args = parser.parse_args()
+
+    for filename, (url, marker, sha256) in ASSETS.items():
+        path, digest = fetch_asset(filename, url, marker, sha256, args.force)
+        print(f"{path}  sha256 {digest}" + ("" if sha256 else "  (not pinned: record it in ASSETS)"))
+
+
+if __name__ == "__main__":
+    main()
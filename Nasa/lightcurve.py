@@ -0,0 +1,183 @@
+"""Transit light curves of circular orbits with quadratic limb darkening.
+
+Every function is vectorized over planets: pass scalars for the form's one
+planet or equal-length arrays (e.g. KOI columns) for a whole table.  The
+blocked flux is integrated over rings of the stellar disk spanning only
+the part the planet covers, using the exact overlap area of each ring
+with the planet's disk, so small planets and grazing transits are as
+accurate as central ones.
+
+Flux is relative to the unocculted star; time is in hours from
+mid-transit.
+"""
+import numpy as np
+import pandas as pd
+
+R_EARTH_KM = 6371
+R_SUN_KM = 696000
+AU_KM = 1.496e8
+
+# Quadratic limb darkening (u1, u2) of a Sun-like star in the Kepler band,
+# used when a row has no koi_ldm_coeff1/koi_ldm_coeff2
+SOLAR_LIMB_DARKENING = (0.40, 0.26)
+
+# Samples per light curve, and rings per sample in the flux integral
+LC_SAMPLES = 200
+N_RINGS = 24
+
+# Half-width of the sampled window, in transit half-durations
+WINDOW = 1.5
+
+# Array elements (planets x samples x ring edges) computed at a time,
+# which bounds the memory used by batches
+BLOCK_ELEMENTS = 2 ** 22
+
+
+def radius_ratio(planet_radius, star_radius):
+    """Planet/star radius ratio from Earth and Solar radii"""
+    return planet_radius * R_EARTH_KM / (star_radius * R_SUN_KM)
+
+
+def semi_major_axis(period, star_mass=1.0):
+    """Orbital distance in AU from the period in days (Kepler's third law)"""
+    return np.cbrt(star_mass * (np.asarray(period, dtype=float) / 365.25) ** 2)
+
+
+def insolation(star_temp, star_radius, sma):
+    """Stellar flux at the planet relative to Earth's"""
+    return (star_temp / 5778) ** 4 * star_radius ** 2 / sma ** 2
+
+
+def transit_durations(period, impact, k, a_rs):
+    """Total (T14) and full (T23) transit durations in hours.
+
+    T14 is NaN for planets that do not transit, T23 is 0 for grazing ones.
+    """
+    sin_i = np.sqrt(np.clip(1 - (impact / a_rs) ** 2, 1e-12, None))
+
+    def duration(chord):
+        arg = np.sqrt(np.clip(chord ** 2 - impact ** 2, 0, None)) / (a_rs * sin_i)
+        return period / np.pi * np.arcsin(np.clip(arg, 0, 1)) * 24
+
+    t14 = np.where(impact < 1 + k, duration(1 + k), np.nan)
+    t23 = np.where(impact < 1 - k, duration(1 - k), 0.0)
+    return t14, t23
+
+
+def _overlap_area(r, z, k):
+    """Area shared by a disk of radius r centred on the star and the planet
+    disk (radius k, centre at distance z), in stellar radii squared"""
+    r = np.maximum(r, 1e-12)
+    z = np.maximum(z, 1e-12)
+    angle_r = np.arccos(np.clip((z ** 2 + r ** 2 - k ** 2) / (2 * z * r), -1, 1))
+    angle_k = np.arccos(np.clip((z ** 2 + k ** 2 - r ** 2) / (2 * z * k), -1, 1))
+    kite = 0.5 * np.sqrt(np.clip((-z + r + k) * (z + r - k) * (z - r + k) * (z + r + k), 0, None))
+    area = r ** 2 * angle_r + k ** 2 * angle_k - kite
+    area = np.where(z >= r + k, 0.0, area)
+    return np.where(z <= np.abs(r - k), np.pi * np.minimum(r, k) ** 2, area)
+
+
+def occulted_flux(z, k, u1, u2, n_rings=N_RINGS):
+    """Relative flux with the planet centre at projected separation z
+    (stellar radii); all arguments broadcast against each other"""
+    z, k, u1, u2 = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (z, k, u1, u2)))
+    lo = np.clip(z - k, 0, 1)[..., None]
+    hi = np.clip(z + k, 0, 1)[..., None]
+    edges = lo + (hi - lo) * np.linspace(0, 1, n_rings + 1)
+    area = _overlap_area(edges, z[..., None], k[..., None])
+
+    mu = np.sqrt(1 - (0.5 * (edges[..., 1:] + edges[..., :-1])) ** 2)
+    intensity = 1 - u1[..., None] * (1 - mu) - u2[..., None] * (1 - mu) ** 2
+    blocked = np.sum(intensity * np.diff(area, axis=-1), axis=-1)
+    # A planet larger than the star can block it all, up to rounding
+    return np.clip(1 - blocked / (np.pi * (1 - u1 / 3 - u2 / 6)), 0, 1)
+
+
+def _geometry(period, impact, star_radius, planet_radius, sma, limb_darkening):
+    period, impact, star_radius, planet_radius = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(a, dtype=float)) for a in (period, impact, star_radius, planet_radius)))
+    if sma is None:
+        sma = semi_major_axis(period)
+    u1, u2 = (np.broadcast_to(np.asarray(u, dtype=float), period.shape) for u in limb_darkening)
+    k = radius_ratio(planet_radius, star_radius)
+    a_rs = np.broadcast_to(np.asarray(sma, dtype=float) * AU_KM / (star_radius * R_SUN_KM), period.shape)
+    return period, impact, k, a_rs, u1, u2
+
+
+def transit_light_curve(period, impact, star_radius, planet_radius, sma=None,
+                        limb_darkening=SOLAR_LIMB_DARKENING, n_samples=LC_SAMPLES):
+    """Sampled light curves around mid-transit: (time in hours, flux).
+
+    Inputs are days, stellar radii, Solar radii, Earth radii and AU (sma
+    defaults to Kepler's law for a Solar-mass star).  Scalars give 1-D
+    arrays, arrays of n planets give (n, n_samples).  Planets that do not
+    transit get a flat curve over the window a central transit would span.
+    """
+    scalar = np.ndim(period) == 0 and np.ndim(planet_radius) == 0
+    period, impact, k, a_rs, u1, u2 = _geometry(period, impact, star_radius, planet_radius, sma, limb_darkening)
+
+    t14, _ = transit_durations(period, impact, k, a_rs)
+    central, _ = transit_durations(period, np.zeros_like(impact), k, a_rs)
+    half_window = np.minimum(WINDOW * np.where(np.isnan(t14), central, t14) / 2, period * 24 / 4)
+    time = half_window[:, None] * np.linspace(-1, 1, n_samples)
+
+    phase = 2 * np.pi * time / (period[:, None] * 24)
+    z = np.hypot(a_rs[:, None] * np.sin(phase), impact[:, None] * np.cos(phase))
+
+    flux = np.empty_like(z)
+    block = max(1, BLOCK_ELEMENTS // (n_samples * (N_RINGS + 1)))
+    for start in range(0, len(z), block):
+        rows = slice(start, start + block)
+        flux[rows] = occulted_flux(z[rows], k[rows, None], u1[rows, None], u2[rows, None])
+    if scalar:
+        return time[0], flux[0]
+    return time, flux
+
+
+def transit_summary(period, impact, star_radius, planet_radius, sma=None,
+                    limb_darkening=SOLAR_LIMB_DARKENING):
+    """Limb-darkened depth (ppm) and total/ingress durations (hours) per
+    planet, without sampling whole curves"""
+    period, impact, k, a_rs, u1, u2 = _geometry(period, impact, star_radius, planet_radius, sma, limb_darkening)
+    t14, t23 = transit_durations(period, impact, k, a_rs)
+    depth = (1 - occulted_flux(impact, k, u1, u2)) * 1e6
+    return {
+        'depth_ppm': depth,
+        'duration_hours': t14,
+        'ingress_hours': (t14 - t23) / 2,
+    }
+
+
+def summarize_koi(frame):
+    """Light-curve summary columns (lc_*) for a KOI table, indexed like it.
+
+    Uses koi_sma and the koi_ldm_coeff1/2 limb darkening when present;
+    rows with missing inputs get NaN.
+    """
+    def column(name, default):
+        if name in frame.columns:
+            return pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=float)
+        return np.full(len(frame), default, dtype=float)
+
+    period = column('koi_period', np.nan)
+    impact = column('koi_impact', np.nan)
+    star_radius = column('koi_srad', np.nan)
+    planet_radius = column('koi_prad', np.nan)
+    sma = column('koi_sma', np.nan)
+    sma = np.where(np.isnan(sma), semi_major_axis(period), sma)
+    u1 = column('koi_ldm_coeff1', SOLAR_LIMB_DARKENING[0])
+    u2 = column('koi_ldm_coeff2', SOLAR_LIMB_DARKENING[1])
+    limb_darkening = (np.where(np.isnan(u1), SOLAR_LIMB_DARKENING[0], u1),
+                      np.where(np.isnan(u2), SOLAR_LIMB_DARKENING[1], u2))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary = transit_summary(period, impact, star_radius, planet_radius, sma, limb_darkening)
+    missing = np.isnan(period) | np.isnan(impact) | np.isnan(star_radius) | np.isnan(planet_radius)
+    return pd.DataFrame({f"lc_{name}": np.where(missing, np.nan, values) for name, values in summary.items()},
+                        index=frame.index)
+
+
+def to_bytes(time, flux):
+    """Little-endian float32 buffer of n times followed by n fluxes, as the
+    simulation component reads it"""
+    return np.concatenate([np.ravel(time), np.ravel(flux)]).astype('<f4').tobytes()
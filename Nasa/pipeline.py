@@ -0,0 +1,139 @@
+"""In-memory representation of a classification pipeline.
+
+A Pipeline is described by plain arrays (scaler mean/scale, polynomial
+powers, feature order and class names) plus a model exposing
+``predict_proba``, so it can be built from the pickled sklearn objects or
+from the native export alike.  Models trained on the Research page have
+no polynomial terms: their powers are the identity.
+"""
+import numpy as np
+
+from preprocessing import FusedScalerPoly, ScalerPoly
+
+
+class Pipeline:
+    """Preprocessing arrays and model for one classification task.
+
+    The model input is the scaled ``passthrough_features`` followed by the
+    polynomial terms (``powers``) of the scaled ``poly_features``.
+    """
+
+    def __init__(self, name, model, classes, input_features, mean, scale, powers,
+                 passthrough_features=(), poly_features=None, version=None):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.classes = np.asarray(classes, dtype=object)
+        self.input_features = list(input_features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.powers = np.asarray(powers)
+        self.passthrough_features = list(passthrough_features)
+        self.poly_features = list(poly_features) if poly_features is not None else self.input_features
+
+        self.feature_index = {feature: i for i, feature in enumerate(self.input_features)}
+        passthrough_idx = [self.feature_index[f] for f in self.passthrough_features]
+        poly_idx = [self.feature_index[f] for f in self.poly_features]
+        # Fused NumPy kernel; the general one covers layouts it does not support
+        try:
+            self.kernel = FusedScalerPoly(self.mean, self.scale, self.powers, passthrough_idx, poly_idx)
+        except ValueError:
+            self.kernel = ScalerPoly(self.mean, self.scale, self.powers, passthrough_idx, poly_idx)
+
+    @classmethod
+    def from_sklearn(cls, name, scaler, poly, model, classes,
+                     passthrough_features=(), poly_features=None):
+        """Build a pipeline from fitted StandardScaler and PolynomialFeatures"""
+        n_features = scaler.n_features_in_
+        return cls(
+            name, model, classes,
+            input_features=scaler.feature_names_in_,
+            mean=scaler.mean_ if scaler.with_mean else np.zeros(n_features),
+            scale=scaler.scale_ if scaler.with_std else np.ones(n_features),
+            powers=poly.powers_,
+            passthrough_features=passthrough_features,
+            poly_features=poly_features,
+        )
+
+    def transform(self, X, out=None):
+        """Scale and expand an (n, len(input_features)) matrix into model input"""
+        return self.kernel.transform(X, out=out)
+
+    def predict(self, X):
+        """Run the model once and return a Prediction for every row of X"""
+        return Prediction(self.model.predict_proba(self.transform(X)), self.classes)
+
+
+class Prediction:
+    """Class probabilities from a single model pass.
+
+    The predicted class index is the argmax of the probabilities, which is
+    what ``model.predict`` would return, so the ensemble is only walked once.
+    """
+
+    def __init__(self, probabilities, classes):
+        self.probabilities = np.asarray(probabilities)
+        self.classes = classes
+        self.indices = np.argmax(self.probabilities, axis=1)
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def labels(self):
+        """Class names, equivalent to label_encoder.inverse_transform(indices)"""
+        return self.classes[self.indices]
+
+    @property
+    def confidence(self):
+        """Probability of the predicted class"""
+        return self.probabilities[np.arange(len(self.indices)), self.indices]
+
+
+class BoosterModel:
+    """``predict_proba`` on a raw xgboost.Booster loaded from the native format"""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def set_threads(self, n_threads):
+        """Limit the threads XGBoost uses per prediction call"""
+        self.booster.set_param({'nthread': n_threads})
+
+    def predict_proba(self, X):
+        probabilities = self.booster.inplace_predict(X)
+        if probabilities.ndim == 1:
+            # binary:logistic returns P(class 1) only
+            return np.column_stack([1 - probabilities, probabilities])
+        return probabilities
+
+
+class LightGBMModel:
+    """``predict_proba`` on a lightgbm.Booster loaded from its text format"""
+
+    def __init__(self, booster):
+        self.booster = booster
+        self.n_threads = 0
+
+    def set_threads(self, n_threads):
+        self.n_threads = n_threads
+
+    def predict_proba(self, X):
+        probabilities = self.booster.predict(X, num_threads=self.n_threads)
+        if probabilities.ndim == 1:
+            return np.column_stack([1 - probabilities, probabilities])
+        return probabilities
+
+
+class CatBoostModel:
+    """``predict_proba`` on a catboost.CatBoost loaded from its .cbm format"""
+
+    def __init__(self, model):
+        self.model = model
+        self.n_threads = -1
+
+    def set_threads(self, n_threads):
+        self.n_threads = n_threads
+
+    def predict_proba(self, X):
+        return self.model.predict(X, prediction_type='Probability', thread_count=self.n_threads)
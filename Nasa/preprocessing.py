@@ -0,0 +1,147 @@
+"""Fused StandardScaler + PolynomialFeatures transform.
+
+For the KOI pipelines the preprocessing is a fixed affine map followed by a
+known set of pairwise products, so instead of two sklearn ``transform``
+calls (each validating and allocating its own array) the whole chain is
+written straight into one preallocated output matrix.  The arithmetic is
+the same elementwise ``(x - mean) / scale`` and ``x_i * x_j`` that sklearn
+performs, so the results are bit-for-bit identical.
+
+Layouts FusedScalerPoly does not handle (degree > 2, or linear terms not
+in input order) use ScalerPoly, which multiplies every term out the way
+PolynomialFeatures does and is just as exact, only slower.
+"""
+import numpy as np
+
+
+class FusedScalerPoly:
+    """Scale, select and expand KOI features in a single pass.
+
+    Output layout matches the pipelines: the scaled ``passthrough_idx``
+    columns followed by the polynomial terms (``powers``) of the scaled
+    ``poly_idx`` columns.  Only degree <= 2 expansions are supported.
+    """
+
+    def __init__(self, mean, scale, powers, passthrough_idx=(), poly_idx=None):
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        powers = np.asarray(powers)
+        passthrough_idx = np.asarray(passthrough_idx, dtype=np.intp)
+        poly_idx = np.arange(len(mean)) if poly_idx is None else np.asarray(poly_idx, dtype=np.intp)
+
+        degrees = powers.sum(axis=1)
+        if degrees.max(initial=0) > 2:
+            raise ValueError("FusedScalerPoly only supports polynomial degree <= 2")
+        n_bias = int(np.count_nonzero(degrees == 0))
+        n_poly = len(poly_idx)
+        if not np.array_equal(powers[n_bias:n_bias + n_poly], np.eye(n_poly, dtype=powers.dtype)):
+            raise ValueError("Expected the linear terms to follow the bias term in input order")
+
+        # Each quadratic term multiplies two columns of the linear block
+        quadratic = powers[n_bias + n_poly:]
+        left, right = [], []
+        for term in quadratic:
+            first, second = np.repeat(np.arange(n_poly), term)
+            left.append(first)
+            right.append(second)
+
+        self.n_input = len(mean)
+        self.n_output = len(passthrough_idx) + len(powers)
+        self._passthrough_idx = passthrough_idx
+        self._passthrough_mean = mean[passthrough_idx]
+        self._passthrough_scale = scale[passthrough_idx]
+        self._poly_idx = poly_idx
+        self._poly_mean = mean[poly_idx]
+        self._poly_scale = scale[poly_idx]
+        self._n_bias = n_bias
+        self._left = np.asarray(left, dtype=np.intp)
+        self._right = np.asarray(right, dtype=np.intp)
+
+    def transform(self, X, out=None):
+        """Transform an (n, n_input) float64 matrix, optionally into ``out``"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_input:
+            raise ValueError(f"Expected an (n, {self.n_input}) matrix, got shape {X.shape}")
+        n_rows = X.shape[0]
+        if out is None:
+            out = np.empty((n_rows, self.n_output), dtype=np.float64)
+
+        # Scaled passthrough columns
+        n_pass = len(self._passthrough_idx)
+        if n_pass:
+            block = out[:, :n_pass]
+            np.subtract(X[:, self._passthrough_idx], self._passthrough_mean, out=block)
+            np.divide(block, self._passthrough_scale, out=block)
+
+        # Bias and linear terms of the expansion
+        start = n_pass + self._n_bias
+        if self._n_bias:
+            out[:, n_pass:start] = 1.0
+        linear = out[:, start:start + len(self._poly_idx)]
+        np.subtract(X[:, self._poly_idx], self._poly_mean, out=linear)
+        np.divide(linear, self._poly_scale, out=linear)
+
+        # Pairwise products, written straight into the trailing block
+        if len(self._left):
+            np.multiply(linear[:, self._left], linear[:, self._right],
+                        out=out[:, start + len(self._poly_idx):])
+        return out
+
+
+class ScalerPoly:
+    """Scale, select and expand KOI features with any polynomial powers.
+
+    Same output layout as FusedScalerPoly.  Each term is multiplied out
+    with its lowest feature index outermost, the order PolynomialFeatures
+    uses, so results stay bit-for-bit identical to the sklearn chain.
+    """
+
+    def __init__(self, mean, scale, powers, passthrough_idx=(), poly_idx=None):
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        powers = np.asarray(powers)
+        passthrough_idx = np.asarray(passthrough_idx, dtype=np.intp)
+        poly_idx = np.arange(len(mean)) if poly_idx is None else np.asarray(poly_idx, dtype=np.intp)
+
+        self.n_input = len(mean)
+        self.n_output = len(passthrough_idx) + len(powers)
+        self._passthrough_idx = passthrough_idx
+        self._poly_idx = poly_idx
+        self._mean = mean
+        self._scale = scale
+        # Column factors of every term, e.g. x0^2 * x3 -> [0, 0, 3]
+        self._terms = [np.repeat(np.arange(len(poly_idx)), term) for term in powers]
+
+    def transform(self, X, out=None):
+        """Transform an (n, n_input) float64 matrix, optionally into ``out``"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_input:
+            raise ValueError(f"Expected an (n, {self.n_input}) matrix, got shape {X.shape}")
+        if out is None:
+            out = np.empty((X.shape[0], self.n_output), dtype=np.float64)
+
+        n_pass = len(self._passthrough_idx)
+        if n_pass:
+            out[:, :n_pass] = (X[:, self._passthrough_idx] - self._mean[self._passthrough_idx]) \
+                / self._scale[self._passthrough_idx]
+        scaled = (X[:, self._poly_idx] - self._mean[self._poly_idx]) / self._scale[self._poly_idx]
+
+        for column, factors in enumerate(self._terms, start=n_pass):
+            if not len(factors):
+                out[:, column] = 1.0
+                continue
+            value = scaled[:, factors[-1]]
+            for factor in factors[-2::-1]:
+                value = scaled[:, factor] * value
+            out[:, column] = value
+        return out
+
+
+def sklearn_transform(scaler, poly, X, passthrough_idx=(), poly_idx=None):
+    """The original StandardScaler + PolynomialFeatures chain, the reference
+    both kernels must reproduce exactly"""
+    scaled = scaler.transform(X)
+    expanded = poly.transform(scaled if poly_idx is None else scaled[:, list(poly_idx)])
+    if not len(passthrough_idx):
+        return expanded
+    return np.hstack([scaled[:, list(passthrough_idx)], expanded])
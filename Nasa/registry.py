@@ -0,0 +1,220 @@
+"""Lazy, per-pipeline model registry with hot swapping.
+
+Each pipeline is loaded the first time it is asked for, so opening the
+Home or Resources page loads nothing, and a missing binary model only
+disables the binary pipeline.
+
+``reload`` loads the newest version of a pipeline in a background thread
+while the current one keeps serving; once the new version is loaded (and
+warmed up by load_bundle) it is swapped in with a single assignment.
+Callers that took a ``lease`` on the old version finish on it, and the
+old version is reported as draining until the last lease is released.
+``watch`` polls the bundle directory and reloads automatically, which
+also brings up a pipeline whose first load failed once a bundle for it
+appears.
+"""
+import contextlib
+import threading
+import time
+
+from artifacts import PIPELINE_FILES, latest_bundle_version, load_pipeline
+
+# Seconds between checks for a newer bundle when watching
+WATCH_INTERVAL = 10.0
+
+
+def _initial_status():
+    return {'loaded': False, 'version': None, 'load_time': None, 'error': None,
+            'reloading': False, 'reload_error': None, 'swapped_at': None}
+
+
+class ModelRegistry:
+    """Loads pipelines on first use, hot-swaps new versions and records
+    per-pipeline load status"""
+
+    def __init__(self, loader=load_pipeline, names=tuple(PIPELINE_FILES), latest_version=latest_bundle_version):
+        self._loader = loader
+        self._latest_version = latest_version
+        self._pipelines = {}
+        self._status = {name: _initial_status() for name in names}
+        self._locks = {name: threading.Lock() for name in names}
+        # Background loads run one at a time: they compete with live
+        # predictions for CPU, and concurrent first imports of a model
+        # library from several threads can fail
+        self._reload_lock = threading.Lock()
+        self._failed_versions = {}
+        # In-flight leases per pipeline object, and swapped-out versions
+        # that still have some
+        self._leases = {}
+        self._retired = {}
+        self._lease_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def get(self, name):
+        """Return the named pipeline, loading it on first use.
+
+        Returns None if loading failed; the reason is in ``status()``.
+        """
+        if name in self._pipelines:
+            return self._pipelines[name]
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name in self._pipelines or self._status[name]['error']:
+                return self._pipelines.get(name)
+
+            start_time = time.perf_counter()
+            try:
+                pipeline = self._loader(name)
+            except Exception as e:
+                self._status[name] = {
+                    **_initial_status(),
+                    'load_time': time.perf_counter() - start_time,
+                    'error': f"{type(e).__name__}: {e}",
+                }
+                # The watcher retries once a different version shows up
+                self._failed_versions[name] = self._latest_version_or_none(name)
+                return None
+
+            self._pipelines[name] = pipeline
+            self._status[name] = {
+                **_initial_status(),
+                'loaded': True,
+                'version': pipeline.version,
+                'load_time': time.perf_counter() - start_time,
+            }
+            return pipeline
+
+    @contextlib.contextmanager
+    def lease(self, name):
+        """Yield the current pipeline (or None) for the duration of a request.
+
+        A version swapped out while leased stays listed as draining in
+        ``status()`` until its last lease is released.
+        """
+        pipeline = self.get(name)
+        if pipeline is None:
+            yield None
+            return
+        key = id(pipeline)
+        with self._lease_lock:
+            self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            yield pipeline
+        finally:
+            with self._lease_lock:
+                self._leases[key] -= 1
+                if not self._leases[key]:
+                    del self._leases[key]
+                    self._retired.pop(key, None)
+
+    def reload(self, name, wait=False):
+        """Load the newest version of a pipeline in the background and swap
+        it in once it is ready; returns the loader thread.
+
+        The current version keeps serving while the new one loads; if
+        loading fails it stays in place and the error is recorded as
+        ``reload_error``.
+        """
+        thread = threading.Thread(target=self._reload, args=(name,), name=f"reload-{name}", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+    def _reload(self, name):
+        # A second request waits and then loads whatever is newest by then
+        with self._reload_lock:
+            self._status[name] = {**self._status[name], 'reloading': True}
+            start_time = time.perf_counter()
+            try:
+                pipeline = self._loader(name)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                # A pipeline that never loaded reports the latest failure
+                current_error = self._status[name]['error'] and error
+                self._status[name] = {**self._status[name], 'reloading': False,
+                                      'reload_error': error, 'error': current_error}
+                return
+
+            with self._locks[name]:
+                old = self._pipelines.get(name)
+                # Readers see either the old or the new pipeline, never a mix
+                self._pipelines[name] = pipeline
+                self._status[name] = {
+                    **_initial_status(),
+                    'loaded': True,
+                    'version': pipeline.version,
+                    'load_time': time.perf_counter() - start_time,
+                    'swapped_at': time.time(),
+                }
+            self._failed_versions.pop(name, None)
+            if old is not None and old is not pipeline:
+                with self._lease_lock:
+                    if self._leases.get(id(old)):
+                        self._retired[id(old)] = old
+
+    def _latest_version_or_none(self, name):
+        try:
+            return self._latest_version(name)
+        except Exception:
+            return None
+
+    def check_for_updates(self):
+        """Reload every pipeline whose newest bundle version differs from
+        the one being served, or that failed to load and now has a newer
+        bundle; returns the names being reloaded.
+
+        Pipelines nobody has asked for yet stay unloaded.
+        """
+        reloading = []
+        for name, status in list(self._status.items()):
+            pipeline = self._pipelines.get(name)
+            if pipeline is None and not status['error']:
+                continue
+            latest = self._latest_version_or_none(name)
+            if latest is None or status['reloading']:
+                continue
+            if pipeline is not None and latest == pipeline.version:
+                continue
+            if (status['reload_error'] or pipeline is None) and self._failed_versions.get(name) == latest:
+                # Do not retry a broken bundle on every poll
+                continue
+            self._failed_versions[name] = latest
+            self.reload(name)
+            reloading.append(name)
+        return reloading
+
+    def watch(self, interval=WATCH_INTERVAL):
+        """Check for newer bundles every ``interval`` seconds in a daemon thread"""
+        if self._watcher is not None:
+            return
+
+        def poll():
+            while not self._stop.wait(interval):
+                self.check_for_updates()
+
+        self._watcher = threading.Thread(target=poll, name="registry-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def reset(self, name):
+        """Forget a pipeline (or its load failure) so the next get() reloads it"""
+        with self._locks[name]:
+            self._pipelines.pop(name, None)
+            self._status[name] = _initial_status()
+
+    def status(self):
+        """Per-pipeline dict of loaded flag, version, load time in seconds,
+        error, reload state and the versions still draining (with their
+        in-flight request counts)"""
+        with self._lease_lock:
+            draining = [(pipeline.name, pipeline.version, self._leases.get(key, 0))
+                        for key, pipeline in self._retired.items()]
+        return {
+            name: {**status, 'draining': {version: count for n, version, count in draining if n == name}}
+            for name, status in self._status.items()
+        }
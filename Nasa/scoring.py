@@ -0,0 +1,343 @@
+"""Headless batch scoring for the binary and multi-class KOI pipelines.
+
+Scores a whole KOI table (DataFrame, NumPy block, CSV or Parquet file) by
+pushing large chunks through the scaler, PolynomialFeatures and the model.
+
+With ``--workers N`` the file is split into row-range shards that are
+scored in a process pool; each worker loads the pipeline once.
+
+``--light-curves`` adds the limb-darkened transit depth and durations of
+every row (see lightcurve.py) as ``lc_*`` columns.
+
+Usage:
+    python scoring.py cumulative_koi.csv --pipeline multiclass --output scored.csv
+    python scoring.py injections.parquet --workers 32 --unordered --output scored.csv
+    python scoring.py cumulative_koi.csv --light-curves --output scored.csv
+"""
+import argparse
+import concurrent.futures
+import io
+import mmap
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import lightcurve
+from artifacts import PIPELINE_FILES, find_bundle, load_bundle, load_pipeline
+from features import add_derived_features, derived_features
+
+# Rows pushed through the model at once; large enough to keep XGBoost busy,
+# small enough to keep memory flat on 100k+ row catalogs
+DEFAULT_CHUNK_SIZE = 50000
+
+# Target size of one CSV shard in parallel scoring; several shards per worker
+# keep the pool busy when some shards parse slower than others
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+# Identifier columns carried through to the scored output when present
+ID_COLUMNS = ['kepid', 'kepoi_name', 'kepler_name']
+
+
+def build_feature_matrix(pipeline, data):
+    """Turn a KOI DataFrame or NumPy block into the pipeline's input matrix.
+
+    Derived features are computed vectorized.  Missing columns and NaN values
+    are imputed with the training mean, i.e. they are neutral after scaling.
+    Returns the float64 matrix and the list of columns that were absent.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = add_derived_features(data, pipeline.input_features)
+        missing = [f for f in pipeline.input_features if f not in data.columns]
+        X = data.reindex(columns=pipeline.input_features).to_numpy(dtype=np.float64)
+    elif isinstance(data, dict) or (isinstance(data, list) and data and isinstance(data[0], dict)):
+        return records_to_matrix(pipeline, [data] if isinstance(data, dict) else data)
+    else:
+        X = np.array(data, dtype=np.float64, ndmin=2)
+        if X.shape[1] != len(pipeline.input_features):
+            raise ValueError(
+                f"Expected {len(pipeline.input_features)} feature columns for the "
+                f"{pipeline.name} pipeline, got {X.shape[1]}"
+            )
+        missing = []
+
+    nan_mask = np.isnan(X)
+    if nan_mask.any():
+        X[nan_mask] = np.broadcast_to(pipeline.mean, X.shape)[nan_mask]
+    return X, missing
+
+
+def records_to_matrix(pipeline, records):
+    """Input matrix for a few KOI dicts, without building a DataFrame.
+
+    This is the low-latency path for online requests; it applies the same
+    derived features and mean imputation as build_feature_matrix.
+    """
+    position = pipeline.feature_index
+    X = np.tile(pipeline.mean, (len(records), 1))
+    present = set()
+    for i, record in enumerate(records):
+        row = {**record, **derived_features(record, position)}
+        for feature, value in row.items():
+            j = position.get(feature)
+            if j is not None and value is not None and value == value:
+                X[i, j] = value
+                present.add(feature)
+    missing = [f for f in pipeline.input_features if f not in present]
+    return X, missing
+
+
+def iter_chunks(data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield consecutive row blocks of a DataFrame or NumPy array"""
+    for start in range(0, len(data), chunk_size):
+        if isinstance(data, pd.DataFrame):
+            yield data.iloc[start:start + chunk_size]
+        else:
+            yield data[start:start + chunk_size]
+
+
+def score_chunk(pipeline, chunk, light_curves=False):
+    """Score one block of rows; returns (results DataFrame, missing columns).
+
+    With ``light_curves`` a DataFrame chunk also gets the lc_* summary columns.
+    """
+    X, missing = build_feature_matrix(pipeline, chunk)
+    prediction = pipeline.predict(X)
+
+    results = pd.DataFrame(
+        prediction.probabilities,
+        columns=[f"prob_{c}" for c in pipeline.classes],
+        index=chunk.index if isinstance(chunk, pd.DataFrame) else None,
+    )
+    results.insert(0, 'predicted_class', prediction.labels)
+    if isinstance(chunk, pd.DataFrame):
+        for i, column in enumerate(c for c in ID_COLUMNS if c in chunk.columns):
+            results.insert(i, column, chunk[column])
+        if light_curves:
+            results = results.join(lightcurve.summarize_koi(chunk))
+    return results, missing
+
+
+def iter_score(pipeline, chunks, light_curves=False):
+    """Score an iterable of chunks, yielding (results, stats) after each one.
+
+    ``stats`` is cumulative: rows, seconds, rows_per_sec and missing_columns.
+    """
+    stats = {'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0, 'missing_columns': []}
+    for chunk in chunks:
+        start_time = time.perf_counter()
+        results, missing = score_chunk(pipeline, chunk, light_curves)
+        stats['seconds'] += time.perf_counter() - start_time
+        stats['rows'] += len(results)
+        if stats['seconds'] > 0:
+            stats['rows_per_sec'] = stats['rows'] / stats['seconds']
+        stats['missing_columns'] = sorted(set(stats['missing_columns']) | set(missing))
+        yield results, stats
+
+
+def score(pipeline, data, chunk_size=DEFAULT_CHUNK_SIZE, light_curves=False):
+    """Score a whole DataFrame or NumPy block; returns (results, stats)"""
+    parts = []
+    stats = {'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0, 'missing_columns': []}
+    for results, stats in iter_score(pipeline, iter_chunks(data, chunk_size), light_curves):
+        parts.append(results)
+    if not parts:
+        columns = ['predicted_class'] + [f"prob_{c}" for c in pipeline.classes]
+        return pd.DataFrame(columns=columns), stats
+    return pd.concat(parts), stats
+
+
+def is_parquet(source):
+    """True if a path or uploaded file object names a Parquet file"""
+    return str(getattr(source, 'name', source)).lower().endswith(".parquet")
+
+
+def read_table_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream a CSV or Parquet KOI table (path or file object) in chunks"""
+    if is_parquet(source):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size)
+
+
+def count_csv_rows(data):
+    """Data rows of a CSV held in memory, without parsing it.
+
+    Line breaks inside quoted fields are not row ends: a break ends a row
+    only after an even number of quotes, as in plan_shards.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    quotes = np.flatnonzero(buffer == ord('"'))
+    breaks = np.flatnonzero(buffer == ord('\n'))
+    rows = np.count_nonzero(np.searchsorted(quotes, breaks) % 2 == 0)
+    if len(buffer) and buffer[-1] != ord('\n'):
+        rows += 1
+    # The first row is the header
+    return max(int(rows) - 1, 0)
+
+
+def plan_shards(path, workers, shard_bytes=DEFAULT_SHARD_BYTES):
+    """Split a CSV or Parquet file into row-range shards.
+
+    Parquet shards are row groups.  CSV shards are byte ranges whose edges
+    are moved to the next line break outside quotes, so every shard holds
+    whole rows (including quoted fields that span lines) and can be parsed
+    independently.  Returns a list of shard dicts.
+    """
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        n_groups = pq.ParquetFile(path).metadata.num_row_groups
+        return [{'path': path, 'row_groups': [i]} for i in range(n_groups)]
+
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        body_start = f.tell()
+        n_shards = max(workers * 4, -(-(size - body_start) // shard_bytes), 1)
+        step = max((size - body_start) // n_shards, 1)
+
+        edges = [body_start]
+        if size > body_start:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # A line break is a row boundary only after an even number of
+                # quotes ("" escapes come in pairs), i.e. outside quoted fields
+                quotes = 0
+                for offset in range(body_start + step, size, step):
+                    if offset <= edges[-1]:
+                        continue
+                    scanned, edge = edges[-1], offset - 1
+                    while True:
+                        edge = (data.find(b"\n", edge) + 1) or size
+                        quotes += data[scanned:edge].count(b'"')
+                        scanned = edge
+                        if quotes % 2 == 0 or edge >= size:
+                            break
+                    if edge >= size:
+                        break
+                    edges.append(edge)
+        edges.append(size)
+
+    columns = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+    return [
+        {'path': path, 'columns': columns, 'start': start, 'end': end}
+        for start, end in zip(edges[:-1], edges[1:]) if end > start
+    ]
+
+
+def read_shard_chunks(shard, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream the rows of one shard from plan_shards in chunks"""
+    if 'row_groups' in shard:
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(shard['path'])
+        for batch in parquet.iter_batches(batch_size=chunk_size, row_groups=shard['row_groups']):
+            yield batch.to_pandas()
+        return
+
+    with open(shard['path'], "rb") as f:
+        f.seek(shard['start'])
+        data = f.read(shard['end'] - shard['start'])
+    yield from pd.read_csv(io.BytesIO(data), header=None, names=shard['columns'], chunksize=chunk_size)
+
+
+# Pipeline of the current pool worker, set once by _init_worker
+_worker_pipeline = None
+
+
+def _init_worker(name, bundle_path):
+    """Pool initializer: load the pipeline once per worker process"""
+    global _worker_pipeline
+    _worker_pipeline = load_bundle(bundle_path) if bundle_path else load_pipeline(name)
+    # The pool already uses every core; more threads per worker only contend
+    if hasattr(_worker_pipeline.model, 'set_threads'):
+        _worker_pipeline.model.set_threads(1)
+
+
+def _score_shard(shard_id, shard, chunk_size, light_curves=False):
+    """Pool task: score one shard; returns (shard_id, results, missing, seconds)"""
+    start_time = time.perf_counter()
+    parts, missing = [], set()
+    for chunk in read_shard_chunks(shard, chunk_size):
+        results, chunk_missing = score_chunk(_worker_pipeline, chunk, light_curves)
+        parts.append(results)
+        missing.update(chunk_missing)
+    results = pd.concat(parts, ignore_index=True) if parts else None
+    return shard_id, results, sorted(missing), time.perf_counter() - start_time
+
+
+def iter_score_parallel(name, path, workers=None, ordered=True,
+                        chunk_size=DEFAULT_CHUNK_SIZE, shard_bytes=DEFAULT_SHARD_BYTES, light_curves=False):
+    """Score a CSV or Parquet file in a process pool.
+
+    Yields (results, stats) per shard like iter_score.  With ``ordered`` the
+    shards come back in file order; otherwise each is yielded as soon as it
+    is done.  ``stats['seconds']`` is wall-clock time since the pool started.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = plan_shards(path, workers, shard_bytes)
+    bundle_path = find_bundle(name)
+    stats = {'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0, 'missing_columns': []}
+
+    # Spawned workers never inherit OpenMP state from a threaded parent
+    context = multiprocessing.get_context("spawn")
+    start_time = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(workers, len(shards)) or 1, mp_context=context,
+        initializer=_init_worker, initargs=(name, bundle_path),
+    ) as executor:
+        futures = [executor.submit(_score_shard, i, shard, chunk_size, light_curves) for i, shard in enumerate(shards)]
+        done = futures if ordered else concurrent.futures.as_completed(futures)
+        for future in done:
+            _, results, missing, _ = future.result()
+            if results is None:
+                continue
+            stats['seconds'] = time.perf_counter() - start_time
+            stats['rows'] += len(results)
+            stats['rows_per_sec'] = stats['rows'] / stats['seconds']
+            stats['missing_columns'] = sorted(set(stats['missing_columns']) | set(missing))
+            yield results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score a KOI table")
+    parser.add_argument("input", help="CSV or Parquet file with KOI rows")
+    parser.add_argument("--pipeline", choices=sorted(PIPELINE_FILES), default="multiclass")
+    parser.add_argument("--output", help="CSV file for the scored rows")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes; 0 uses every core")
+    parser.add_argument("--unordered", action="store_true",
+                        help="With --workers, write shards as they finish instead of in file order")
+    parser.add_argument("--light-curves", action="store_true",
+                        help="Add limb-darkened transit depth and duration columns")
+    args = parser.parse_args()
+
+    if args.workers != 1:
+        scored = iter_score_parallel(args.pipeline, args.input, args.workers or None,
+                                     ordered=not args.unordered, chunk_size=args.chunk_size,
+                                     light_curves=args.light_curves)
+    else:
+        scored = iter_score(load_pipeline(args.pipeline), read_table_chunks(args.input, args.chunk_size),
+                            args.light_curves)
+
+    stats = {'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0, 'missing_columns': []}
+    header = True
+    for results, stats in scored:
+        if args.output:
+            results.to_csv(args.output, mode="w" if header else "a", header=header, index=False)
+            header = False
+
+    if stats['missing_columns']:
+        print(f"Imputed missing columns: {', '.join(stats['missing_columns'])}")
+    print(f"Scored {stats['rows']} rows in {stats['seconds']:.2f} s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Standalone HTTP inference service for the classification pipelines.
+
+Serves the same bundles and derived-feature logic as the Streamlit app
+without a script rerun per prediction.  Several worker processes share one
+listening socket; each loads the pipelines once at start-up.
+
+Endpoints:
+    GET  /health               per-pipeline load status
+    POST /predict/binary       one KOI object -> prediction
+    POST /predict/multiclass   one KOI object -> prediction
+    POST /predict/batch        {"pipeline": "...", "rows": [KOI objects]}
+    POST /admin/reload         {"pipeline": "..."} or {} for all; loads the
+                               newest bundle in the background, then swaps
+
+With ``--coalesce`` concurrent single-object requests in a worker are
+micro-batched into one model call (see coalescer.py); GET /stats reports
+the batch-size histogram.
+
+New bundles are picked up without a restart: with ``--watch-interval``
+every worker polls the bundle directory, loads a newer version in the
+background and swaps it in while requests in flight finish on the old
+one.  /admin/reload only reaches the worker that happens to accept it,
+so use the watcher with several workers.
+
+Usage:
+    python service.py --port 8000 --workers 4 --coalesce --max-wait-ms 2 --watch-interval 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from artifacts import PIPELINE_FILES, load_pipeline
+from coalescer import BackgroundLoop, BatcherClosed, MicroBatcher
+from pipeline import Prediction
+from registry import ModelRegistry
+from scoring import build_feature_matrix
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+
+def prediction_payload(pipeline, prediction):
+    """JSON-ready list of results, one per scored row"""
+    return [
+        {
+            'predicted_class': str(prediction.labels[i]),
+            'confidence': float(prediction.confidence[i]),
+            'probabilities': {str(c): float(p) for c, p in zip(pipeline.classes, prediction.probabilities[i])},
+        }
+        for i in range(len(prediction))
+    ]
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """Routes requests to the registry held by the server"""
+
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body go out as separate writes; without TCP_NODELAY Nagle's
+    # algorithm and delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Per-request logging to stderr costs more than the prediction
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError(f"Request body larger than {MAX_BODY_BYTES} bytes")
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.registry.status())
+        elif self.path == "/stats":
+            self._send_json(200, {name: batcher.stats() for name, batcher in self.server.batchers.items()})
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        if self.path == "/admin/reload":
+            names = [payload['pipeline']] if isinstance(payload, dict) and payload.get('pipeline') else list(PIPELINE_FILES)
+            unknown = [name for name in names if name not in PIPELINE_FILES]
+            if unknown:
+                self._send_json(404, {'error': f"Unknown pipeline {unknown[0]}"})
+                return
+            for name in names:
+                self.server.registry.reload(name)
+            self._send_json(202, {'reloading': names})
+            return
+
+        if self.path == "/predict/batch":
+            if not isinstance(payload, dict) or not isinstance(payload.get('rows'), list):
+                self._send_json(400, {'error': "Expected {\"pipeline\": ..., \"rows\": [...]}"})
+                return
+            name, rows = payload.get('pipeline', 'multiclass'), payload['rows']
+        elif self.path.startswith("/predict/"):
+            name, rows = self.path[len("/predict/"):], payload
+            if not isinstance(rows, dict):
+                self._send_json(400, {'error': "Expected one KOI object"})
+                return
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+
+        if name not in PIPELINE_FILES:
+            self._send_json(404, {'error': f"Unknown pipeline {name}"})
+            return
+        # The lease keeps a swapped-out version serving this request to the end
+        with self.server.registry.lease(name) as pipeline:
+            self._predict(name, pipeline, rows)
+
+    def _batcher(self, name, pipeline):
+        """Micro-batcher bound to this pipeline version, or None without --coalesce"""
+        server = self.server
+        if server.coalesce is None:
+            return None
+        with server.batchers_lock:
+            batcher = server.batchers.get(name)
+            if server.batched_pipelines.get(name) is not pipeline:
+                if pipeline is not server.registry.get(name):
+                    # A request still on a swapped-out version is scored on its own
+                    return None
+                # A hot swap: the old batcher finishes its queued rows and stops
+                if batcher is not None:
+                    server.event_loop.run(batcher.close())
+                batcher = MicroBatcher(lambda X: pipeline.predict(X).probabilities, **server.coalesce)
+                server.batchers[name] = batcher
+                server.batched_pipelines[name] = pipeline
+        return batcher
+
+    def _predict(self, name, pipeline, rows):
+        if pipeline is None:
+            self._send_json(503, {'error': self.server.registry.status()[name]['error']})
+            return
+        if isinstance(rows, list) and not rows:
+            self._send_json(200, {'pipeline': name, 'version': pipeline.version, 'results': []})
+            return
+
+        try:
+            X, missing = build_feature_matrix(pipeline, rows)
+            batcher = self._batcher(name, pipeline) if isinstance(rows, dict) else None
+            prediction = None
+            if batcher is not None:
+                try:
+                    probabilities = self.server.event_loop.run(batcher.predict(X))
+                    prediction = Prediction(probabilities, pipeline.classes)
+                except BatcherClosed:
+                    # Closed by a hot swap after _batcher() returned it
+                    pass
+            if prediction is None:
+                prediction = pipeline.predict(X)
+        except (TypeError, ValueError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        results = prediction_payload(pipeline, prediction)
+        response = {'pipeline': name, 'version': pipeline.version, 'missing_columns': missing}
+        if isinstance(rows, dict):
+            response.update(results[0])
+        else:
+            response['results'] = results
+        self._send_json(200, response)
+
+
+def load_registry(threads_per_worker):
+    """Registry with every available pipeline loaded and thread-limited,
+    including versions swapped in later"""
+
+    def load_limited(name):
+        pipeline = load_pipeline(name)
+        if hasattr(pipeline.model, 'set_threads'):
+            pipeline.model.set_threads(threads_per_worker)
+        return pipeline
+
+    registry = ModelRegistry(loader=load_limited)
+    for name in PIPELINE_FILES:
+        registry.get(name)
+    return registry
+
+
+def run_worker(listen_socket, threads_per_worker, coalesce=None, watch_interval=None):
+    """Serve requests on an already bound socket until interrupted.
+
+    ``coalesce`` is None or a dict of MicroBatcher keyword arguments;
+    ``watch_interval`` enables polling for new bundles.
+    """
+    server = ThreadingHTTPServer(listen_socket.getsockname(), PredictionHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = listen_socket
+    server.daemon_threads = True
+    server.registry = load_registry(threads_per_worker)
+    if watch_interval:
+        server.registry.watch(watch_interval)
+    server.coalesce = coalesce
+    server.batchers = {}
+    server.batched_pipelines = {}
+    server.batchers_lock = threading.Lock()
+    if coalesce is not None:
+        server.event_loop = BackgroundLoop()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(host, port, workers, threads_per_worker=1, coalesce=None, watch_interval=None):
+    """Bind once and serve from ``workers`` processes sharing the socket"""
+    listen_socket = socket.create_server((host, port), backlog=1024)
+    print(f"Serving on http://{host}:{port} with {workers} worker(s)")
+    if workers <= 1:
+        run_worker(listen_socket, threads_per_worker, coalesce, watch_interval)
+        return
+
+    # Forked children inherit the listening socket
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=run_worker, args=(listen_socket, threads_per_worker, coalesce, watch_interval),
+                        daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exoplanet classification HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes sharing the listening socket")
+    parser.add_argument("--threads-per-worker", type=int, default=1,
+                        help="XGBoost threads per prediction call")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Micro-batch concurrent single-object requests")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--watch-interval", type=float, default=0,
+                        help="Seconds between checks for newer bundles; 0 disables hot reloading")
+    args = parser.parse_args()
+
+    coalesce = None
+    if args.coalesce:
+        coalesce = {'max_batch_size': args.max_batch_size, 'max_wait_ms': args.max_wait_ms}
+    serve(args.host, args.port, args.workers, args.threads_per_worker, coalesce, args.watch_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""The array preprocessing kernels must reproduce the sklearn chain bit for bit"""
+import numpy as np
+import pytest
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+import artifacts
+from pipeline import Pipeline
+from preprocessing import FusedScalerPoly, ScalerPoly, sklearn_transform
+
+
+def shipped_chain(name):
+    if not artifacts.has_pickles(name):
+        pytest.skip(f"the pickled {name} artifacts are not in the repository")
+    files = artifacts.PIPELINE_FILES[name]
+    scaler = artifacts._load_pickle(artifacts.BASE_DIR, files['scaler'])
+    poly = artifacts._load_pickle(artifacts.BASE_DIR, files['poly'])
+    return scaler, poly, artifacts.load_pickle_pipeline(name)
+
+
+def sample_rows(scaler, n_rows=1000):
+    rng = np.random.default_rng(0)
+    return scaler.mean_ + scaler.scale_ * rng.standard_normal((n_rows, len(scaler.mean_)))
+
+
+@pytest.mark.parametrize("name", sorted(artifacts.PIPELINE_FILES))
+@pytest.mark.parametrize("kernel", [FusedScalerPoly, ScalerPoly])
+def test_kernels_match_shipped_sklearn_chain(name, kernel):
+    scaler, poly, pipeline = shipped_chain(name)
+    passthrough_idx = [pipeline.feature_index[f] for f in pipeline.passthrough_features]
+    poly_idx = [pipeline.feature_index[f] for f in pipeline.poly_features]
+    X = sample_rows(scaler)
+
+    transformed = kernel(pipeline.mean, pipeline.scale, pipeline.powers, passthrough_idx, poly_idx).transform(X)
+    assert np.array_equal(transformed, sklearn_transform(scaler, poly, X, passthrough_idx, poly_idx))
+
+
+@pytest.mark.parametrize("name", sorted(artifacts.PIPELINE_FILES))
+def test_served_pipelines_match_shipped_sklearn_chain(name):
+    shipped_chain(name)
+    for identical, difference in artifacts.check_sklearn_equivalence(name).values():
+        assert identical
+        assert difference == 0
+
+
+def test_degree_three_falls_back_to_general_kernel():
+    rng = np.random.default_rng(1)
+    X = rng.normal(3, 2, size=(500, 6))
+    scaler = StandardScaler().fit(X)
+    poly = PolynomialFeatures(3, include_bias=False).fit(scaler.transform(X)[:, :4])
+    features = list("abcdef")
+
+    with pytest.raises(ValueError):
+        FusedScalerPoly(scaler.mean_, scaler.scale_, poly.powers_, range(6), range(4))
+    pipeline = Pipeline("test", None, ["x"], features, scaler.mean_, scaler.scale_, poly.powers_,
+                        passthrough_features=features, poly_features=features[:4])
+    assert isinstance(pipeline.kernel, ScalerPoly)
+
+    expected = sklearn_transform(scaler, poly, X, range(6), range(4))
+    assert np.array_equal(pipeline.transform(X), expected)
+    out = np.empty_like(expected)
+    assert pipeline.transform(X, out=out) is out
+    assert np.array_equal(out, expected)
@@ -0,0 +1,72 @@
+"""Hot swapping and load-failure recovery of ModelRegistry"""
+import threading
+
+from registry import ModelRegistry
+
+
+class FakePipeline:
+    def __init__(self, name, version):
+        self.name = name
+        self.version = version
+
+
+def make_registry(bundles):
+    """Registry over a dict of name -> newest version ('broken' or None fail)"""
+    def loader(name):
+        if bundles[name] in (None, 'broken'):
+            raise FileNotFoundError(f"no usable {name} bundle")
+        return FakePipeline(name, bundles[name])
+
+    return ModelRegistry(loader=loader, names=tuple(bundles), latest_version=lambda name: bundles[name])
+
+
+def wait_for_reloads():
+    for thread in threading.enumerate():
+        if thread.name.startswith("reload-"):
+            thread.join()
+
+
+def test_swap_keeps_leased_version_draining():
+    bundles = {'multiclass': "v1"}
+    registry = make_registry(bundles)
+    with registry.lease('multiclass') as old:
+        bundles['multiclass'] = "v2"
+        registry.reload('multiclass', wait=True)
+        assert registry.get('multiclass').version == "v2"
+        assert old.version == "v1"
+        assert registry.status()['multiclass']['draining'] == {"v1": 1}
+    assert registry.status()['multiclass']['draining'] == {}
+
+
+def test_failed_reload_keeps_serving_current_version():
+    bundles = {'multiclass': "v1"}
+    registry = make_registry(bundles)
+    registry.get('multiclass')
+    bundles['multiclass'] = 'broken'
+    registry.reload('multiclass', wait=True)
+
+    status = registry.status()['multiclass']
+    assert registry.get('multiclass').version == "v1"
+    assert status['loaded'] and status['reload_error'] and not status['error']
+
+
+def test_watcher_retries_failed_first_load_once_per_new_version():
+    bundles = {'binary': None, 'multiclass': "v1"}
+    registry = make_registry(bundles)
+    assert registry.get('binary') is None
+    assert registry.check_for_updates() == []
+
+    bundles['binary'] = 'broken'
+    assert registry.check_for_updates() == ['binary']
+    wait_for_reloads()
+    assert registry.status()['binary']['error']
+    assert registry.check_for_updates() == []
+
+    bundles['binary'] = "v2"
+    assert registry.check_for_updates() == ['binary']
+    wait_for_reloads()
+    status = registry.status()['binary']
+    assert status['loaded'] and status['version'] == "v2" and not status['error']
+    assert registry.get('binary').version == "v2"
+    # Never asked for, so never loaded
+    assert not registry.status()['multiclass']['loaded']
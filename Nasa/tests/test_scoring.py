@@ -0,0 +1,30 @@
+"""CSV sharding for parallel scoring"""
+import pandas as pd
+import pytest
+
+from scoring import count_csv_rows, plan_shards, read_shard_chunks
+
+
+def quoted_frame():
+    return pd.DataFrame({
+        'kepoi_name': [f"K{i:05d}.01" for i in range(200)],
+        'koi_period': [1.5 + i for i in range(200)],
+        'koi_comment': ['spans\n"two" lines,\nwith commas' if i % 3 else "plain" for i in range(200)],
+    })
+
+
+@pytest.mark.parametrize("shard_bytes", [40, 500, 10 ** 8])
+def test_shards_keep_quoted_multiline_fields_whole(tmp_path, shard_bytes):
+    path = tmp_path / "koi.csv"
+    quoted_frame().to_csv(path, index=False)
+
+    shards = plan_shards(str(path), workers=4, shard_bytes=shard_bytes)
+    scored = pd.concat([chunk for shard in shards for chunk in read_shard_chunks(shard)], ignore_index=True)
+    pd.testing.assert_frame_equal(scored, pd.read_csv(path))
+
+
+def test_row_count_ignores_line_breaks_in_quoted_fields():
+    data = quoted_frame().to_csv(index=False).encode()
+    assert count_csv_rows(data) == 200
+    assert count_csv_rows(data.rstrip(b"\n")) == 200
+    assert count_csv_rows(b"kepoi_name\n") == 0
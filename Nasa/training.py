@@ -0,0 +1,556 @@
+"""Model training for the Research page.
+
+Fit functions take scaled train/test matrices and report progress
+through a callback; ``run_training`` feeds them a single split of the
+prepared (X, y, classes) from datasets.py, ``run_fold`` one of the
+precomputed cross-validation folds.  TrainingJobs runs them in a pool of
+background processes so a long fit never blocks a Streamlit script run:
+``submit`` returns a job ID at once and ``status`` reports trees built,
+elapsed time and the latest evaluation metric.
+
+``submit_sweep`` trains every combination of a parameter grid as separate
+jobs; trials that fall clearly behind the others are stopped early by a
+shared MedianPruner, and ``sweep_status`` returns the leaderboard.
+
+``submit_cross_validation`` trains the folds side by side and
+``cross_validation_status`` combines them into mean/std metrics.
+
+Single-split runs are exported as servable bundles under RUNS_DIR (see
+``export_run`` and ``artifacts.promote_bundle``).
+"""
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import shutil
+import statistics
+import time
+import uuid
+
+import numpy as np
+
+import artifacts
+import datasets
+from pipeline import Pipeline
+
+# Fraction of the data held out for evaluation
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+# Progress is reported about this many times per fit
+PROGRESS_STEPS = 20
+
+# Sweep pruning: trials are only compared after this fraction of their
+# trees, and stopped when this far below the median accuracy of the others
+PRUNE_WARMUP = 0.25
+PRUNE_MARGIN = 0.01
+PRUNE_MIN_TRIALS = 3
+
+# Bundles of single-split training runs, ready to be promoted for serving;
+# only the newest RUNS_KEEP are kept
+RUNS_DIR = os.path.join(artifacts.BASE_DIR, ".cache", "runs")
+RUNS_KEEP = 20
+
+
+def split_and_scale(X, y):
+    """Stratified train/test split with a StandardScaler fitted on the train part"""
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y
+    )
+    scaler = StandardScaler()
+    return scaler.fit_transform(X_train), scaler.transform(X_test), y_train, y_test, scaler
+
+
+def evaluate(model, X_test, y_test, classes):
+    """Accuracy, confusion matrix and per-class report on the held-out rows"""
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+
+    y_pred = model.predict(X_test)
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'confusion_matrix': confusion_matrix(y_test, y_pred),
+        'classification_report': classification_report(
+            y_test, y_pred, target_names=[str(c) for c in classes], output_dict=True
+        ),
+    }
+
+
+def fit_random_forest(X_train, y_train, X_test, y_test, params, progress=None, n_jobs=-1):
+    """Fit a RandomForestClassifier, growing it in steps to report progress.
+
+    With warm_start and a fixed random_state the forest is identical to a
+    single fit with the final n_estimators.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    total = int(params['n_estimators'])
+    model = RandomForestClassifier(**params, warm_start=True, random_state=RANDOM_STATE, n_jobs=n_jobs)
+    step = max(total // PROGRESS_STEPS, 1)
+    for n_trees in list(range(step, total, step)) + [total]:
+        model.set_params(n_estimators=n_trees)
+        model.fit(X_train, y_train)
+        # A true return value from progress stops the fit early
+        if progress is not None and progress(
+                n_trees, total, {'accuracy': float(np.mean(model.predict(X_test) == y_test))}):
+            break
+    return model
+
+
+def fit_xgboost(X_train, y_train, X_test, y_test, params, progress=None, n_jobs=-1):
+    """Fit an XGBClassifier, reporting held-out accuracy and mlogloss as it goes"""
+    import xgboost as xgb
+
+    total = int(params['n_estimators'])
+    step = max(total // PROGRESS_STEPS, 1)
+
+    class Progress(xgb.callback.TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            done = epoch + 1
+            if progress is None or (done % step and done != total):
+                return False
+            scores = evals_log['validation_0']
+            # A true return value stops boosting
+            return bool(progress(done, total, {
+                'accuracy': 1 - scores['merror'][-1], 'mlogloss': scores['mlogloss'][-1],
+            }))
+
+    model = xgb.XGBClassifier(
+        **params, random_state=RANDOM_STATE, eval_metric=['merror', 'mlogloss'], n_jobs=n_jobs,
+        callbacks=[Progress()],
+    )
+    model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+    # The progress callback is local to this call and would make the model unpicklable
+    model.callbacks = None
+    return model
+
+
+def fit_lightgbm(X_train, y_train, X_test, y_test, params, progress=None, n_jobs=-1):
+    """Fit an LGBMClassifier (histogram-based, multithreaded) with progress reports"""
+    import lightgbm as lgb
+
+    total = int(params['n_estimators'])
+    step = max(total // PROGRESS_STEPS, 1)
+
+    def report(env):
+        done = env.iteration + 1
+        if progress is None or (done % step and done != total):
+            return
+        scores = {name: value for _, name, value, _ in env.evaluation_result_list}
+        if progress(done, total, {'accuracy': 1 - scores['multi_error'], 'mlogloss': scores['multi_logloss']}):
+            raise lgb.callback.EarlyStopException(env.iteration, env.evaluation_result_list)
+
+    # Row subsampling only takes effect with a bagging frequency
+    model = lgb.LGBMClassifier(**params, subsample_freq=1, random_state=RANDOM_STATE, n_jobs=n_jobs, verbose=-1)
+    model.fit(X_train, y_train, eval_set=[(X_test, y_test)], eval_metric='multi_error', callbacks=[report])
+    return model
+
+
+def fit_catboost(X_train, y_train, X_test, y_test, params, progress=None, n_jobs=-1):
+    """Fit a CatBoostClassifier (histogram-based, multithreaded) with progress reports"""
+    import catboost
+
+    total = int(params['n_estimators'])
+    step = max(total // PROGRESS_STEPS, 1)
+
+    class Progress:
+        def after_iteration(self, info):
+            done = info.iteration
+            if progress is None or (done % step and done != total):
+                return True
+            metrics = info.metrics['validation']
+            # CatBoost continues while this returns True
+            return not progress(done, total, {
+                'accuracy': metrics['Accuracy'][-1], 'mlogloss': metrics['MultiClass'][-1],
+            })
+
+    model = catboost.CatBoostClassifier(
+        **params, loss_function='MultiClass', eval_metric='Accuracy', random_seed=RANDOM_STATE,
+        thread_count=n_jobs, verbose=False, allow_writing_files=False,
+    )
+    model.fit(X_train, y_train, eval_set=(X_test, y_test), callbacks=[Progress()])
+    return model
+
+
+def fit_adaboost(X_train, y_train, X_test, y_test, params, progress=None, n_jobs=-1):
+    """Fit an AdaBoostClassifier on decision stumps.
+
+    Boosting is sequential and single-threaded; progress is reported from
+    the staged predictions once the fit is done.
+    """
+    from sklearn.ensemble import AdaBoostClassifier
+
+    total = int(params['n_estimators'])
+    step = max(total // PROGRESS_STEPS, 1)
+    model = AdaBoostClassifier(**params, random_state=RANDOM_STATE).fit(X_train, y_train)
+    if progress is not None:
+        for done, accuracy in enumerate(model.staged_score(X_test, y_test), start=1):
+            if (done % step == 0 or done == len(model.estimators_)) and progress(done, total, {'accuracy': accuracy}):
+                break
+    return model
+
+
+def fit_gradient_boosting(X_train, y_train, X_test, y_test, params, progress=None, n_jobs=-1):
+    """Fit a HistGradientBoostingClassifier, growing it in steps to report progress.
+
+    The histogram implementation is multithreaded through OpenMP;
+    ``n_jobs`` caps its thread count.
+    """
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from threadpoolctl import threadpool_limits
+
+    params = dict(params)
+    total = int(params.pop('n_estimators'))
+    model = HistGradientBoostingClassifier(
+        **params, max_iter=total, warm_start=True, early_stopping=False, random_state=RANDOM_STATE,
+    )
+    step = max(total // PROGRESS_STEPS, 1)
+    with threadpool_limits(limits=n_jobs if n_jobs > 0 else None, user_api='openmp'):
+        for n_iterations in list(range(step, total, step)) + [total]:
+            model.set_params(max_iter=n_iterations)
+            model.fit(X_train, y_train)
+            if progress is not None and progress(
+                    n_iterations, total, {'accuracy': float(np.mean(model.predict(X_test) == y_test))}):
+                break
+    return model
+
+
+# Fit functions take already scaled train/test matrices and return the model;
+# every one plans params['n_estimators'] boosting rounds or trees
+TRAINERS = {
+    'Random Forest': fit_random_forest,
+    'XGBoost': fit_xgboost,
+    'LightGBM': fit_lightgbm,
+    'CatBoost': fit_catboost,
+    'AdaBoost': fit_adaboost,
+    'Gradient Boosting': fit_gradient_boosting,
+}
+
+# Trainers that need a package beyond the app's requirements
+OPTIONAL_PACKAGES = {
+    'LightGBM': 'lightgbm',
+    'CatBoost': 'catboost',
+}
+
+
+def missing_package(algorithm):
+    """Name of the optional package an algorithm needs but is not installed, else None"""
+    package = OPTIONAL_PACKAGES.get(algorithm)
+    if package is None:
+        return None
+    try:
+        __import__(package)
+    except ImportError:
+        return package
+    return None
+
+
+def _describe(result, algorithm, params, classes, start_time):
+    result.update({
+        'algorithm': algorithm,
+        'training_time': time.time() - start_time,
+        'classes': np.asarray(classes),
+        'hyperparameters': dict(params),
+    })
+    return result
+
+
+def export_run(result, model, scaler, feature_names, export_dir=RUNS_DIR):
+    """Write a trained model and its scaler as a multiclass bundle; returns its path.
+
+    The bundle's preprocessing is the scaler alone (identity powers, no
+    polynomial terms), so the classification pages and scoring.py load it
+    like any other bundle.
+    """
+    n_features = len(feature_names)
+    pipeline = Pipeline(
+        'multiclass', model, result['classes'], input_features=feature_names,
+        mean=scaler.mean_, scale=scaler.scale_, powers=np.eye(n_features, dtype=np.int64),
+    )
+    slug = result['algorithm'].lower().replace(" ", "-")
+    version = f"{time.strftime('%Y.%m.%d.%H%M%S')}-{slug}-{uuid.uuid4().hex[:6]}"
+    metrics = {key: result[key] for key in ('algorithm', 'accuracy', 'confusion_matrix',
+                                            'classification_report', 'training_time', 'hyperparameters')}
+    path = artifacts.write_bundle(pipeline, version, root=export_dir, metrics=metrics,
+                                  trained=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    for manifest in artifacts.list_bundles(export_dir)[:-RUNS_KEEP]:
+        shutil.rmtree(manifest['path'], ignore_errors=True)
+    return path
+
+
+def run_training(algorithm, params, X, y, classes, progress=None, n_jobs=-1, export_dir=None):
+    """Train one model on a single split; returns the dict the Research page shows.
+
+    With ``export_dir`` the fitted model is also written there as a bundle,
+    whose path is returned as ``bundle_path``.
+    """
+    start_time = time.time()
+    X_train, X_test, y_train, y_test, scaler = split_and_scale(X, y)
+    model = TRAINERS[algorithm](X_train, y_train, X_test, y_test, params, progress=progress, n_jobs=n_jobs)
+    result = _describe(evaluate(model, X_test, y_test, classes), algorithm, params, classes, start_time)
+    if export_dir is not None:
+        result['bundle_path'] = export_run(result, model, scaler, list(X.columns), export_dir)
+    return result
+
+
+def run_fold(algorithm, params, folds_dir, fold, progress=None, n_jobs=-1):
+    """Train and evaluate on one precomputed cross-validation fold"""
+    start_time = time.time()
+    X_train, X_test, y_train, y_test = datasets.read_cv_fold(folds_dir, fold)
+    classes = datasets.read_cv_classes(folds_dir)
+    model = TRAINERS[algorithm](X_train, y_train, X_test, y_test, params, progress=progress, n_jobs=n_jobs)
+    return _describe(evaluate(model, X_test, y_test, classes), algorithm, params, classes, start_time)
+
+
+def combine_folds(results, wall_time):
+    """Cross-validated result: fold means with standard deviations.
+
+    The confusion matrix is summed over the folds, i.e. it covers every row
+    exactly once; per-class report entries are fold averages.
+    """
+    first = results[0]
+    weighted = [r['classification_report']['weighted avg'] for r in results]
+    accuracies = [r['accuracy'] for r in results]
+    report = {}
+    for key, entry in first['classification_report'].items():
+        if isinstance(entry, dict):
+            report[key] = {
+                metric: (float(np.sum([r['classification_report'][key][metric] for r in results]))
+                         if metric == 'support' else
+                         float(np.mean([r['classification_report'][key][metric] for r in results])))
+                for metric in entry
+            }
+    return {
+        **{key: first[key] for key in ('algorithm', 'classes', 'hyperparameters')},
+        'accuracy': float(np.mean(accuracies)),
+        'confusion_matrix': np.sum([r['confusion_matrix'] for r in results], axis=0),
+        'classification_report': report,
+        'training_time': wall_time,
+        'cv': {
+            'folds': len(results),
+            'accuracy': (float(np.mean(accuracies)), float(np.std(accuracies))),
+            **{metric: (float(np.mean([w[metric] for w in weighted])), float(np.std([w[metric] for w in weighted])))
+               for metric in ('precision', 'recall', 'f1-score')},
+            'fold_time': float(np.sum([r['training_time'] for r in results])),
+        },
+    }
+
+
+def _init_worker():
+    # Training yields the CPU to the classification pages and the service
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def parameter_grid(grid):
+    """Every combination of a {parameter: [values]} grid, as a list of dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def parse_grid_values(text):
+    """Values of a comma-separated grid field: ints, floats, None or strings"""
+    values = []
+    for item in (part.strip() for part in text.split(",")):
+        if not item:
+            continue
+        if item == "None":
+            values.append(None)
+            continue
+        for cast in (int, float):
+            try:
+                values.append(cast(item))
+                break
+            except ValueError:
+                pass
+        else:
+            values.append(item)
+    return values
+
+
+class MedianPruner:
+    """Stops sweep trials whose held-out accuracy is clearly below the rest.
+
+    Trials are compared at the same fraction of their planned trees.  The
+    shared tables are multiprocessing.Manager proxies, so the pruner works
+    across the pool's processes.
+    """
+
+    def __init__(self, table, lock, warmup=PRUNE_WARMUP, margin=PRUNE_MARGIN, min_trials=PRUNE_MIN_TRIALS):
+        self.table = table
+        self.lock = lock
+        self.warmup = warmup
+        self.margin = margin
+        self.min_trials = min_trials
+
+    def should_stop(self, trial_id, done, total, accuracy):
+        checkpoint = round(done / total * PROGRESS_STEPS)
+        with self.lock:
+            # Manager dicts only see reassignment, not in-place mutation
+            scores = self.table.get(checkpoint, {})
+            scores[trial_id] = accuracy
+            self.table[checkpoint] = scores
+        others = [score for trial, score in scores.items() if trial != trial_id]
+        if done >= total or done / total < self.warmup or len(others) < self.min_trials:
+            return False
+        return accuracy < statistics.median(others) - self.margin
+
+
+def _run_job(job_id, algorithm, params, data, progress_table, n_jobs, pruner=None, export_dir=None):
+    """Pool task; data is (X, y, classes) or (folds_dir, fold)"""
+    start_time = time.time()
+    pruned = []
+
+    def report(done, total, metric):
+        progress_table[job_id] = {
+            'done': done, 'total': total, 'elapsed': time.time() - start_time, 'metric': metric,
+        }
+        if pruner is not None and 'accuracy' in metric and pruner.should_stop(job_id, done, total, metric['accuracy']):
+            pruned.append(done)
+            return True
+        return False
+
+    report(0, int(params['n_estimators']), {})
+    if len(data) == 2:
+        result = run_fold(algorithm, params, *data, progress=report, n_jobs=n_jobs)
+    else:
+        result = run_training(algorithm, params, *data, progress=report, n_jobs=n_jobs, export_dir=export_dir)
+    result['pruned_at'] = pruned[0] if pruned else None
+    return result
+
+
+class TrainingJobs:
+    """Background training in a process pool shared by all sessions.
+
+    At most ``max_workers`` fits run at once, each with ``threads_per_job``
+    threads; further jobs wait in the queue.
+    """
+
+    def __init__(self, max_workers=None, threads_per_job=None):
+        cpus = os.cpu_count() or 1
+        self.max_workers = max_workers or max(cpus // 2, 1)
+        self.threads_per_job = threads_per_job or max(cpus // self.max_workers, 1)
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._progress = self._manager.dict()
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            self.max_workers, mp_context=context, initializer=_init_worker,
+        )
+        self._jobs = {}
+        self._sweeps = {}
+        self._cross_validations = {}
+
+    def _submit(self, algorithm, params, data, pruner=None, threads=None, export_dir=None):
+        if algorithm not in TRAINERS:
+            raise ValueError(f"No trainer for {algorithm}")
+        job_id = uuid.uuid4().hex[:12]
+        job = {'algorithm': algorithm, 'params': dict(params), 'submitted': time.time(), 'finished': None}
+        job['future'] = self._executor.submit(
+            _run_job, job_id, algorithm, dict(params), data, self._progress,
+            threads or self.threads_per_job, pruner, export_dir,
+        )
+        job['future'].add_done_callback(lambda _: job.update(finished=time.time()))
+        self._jobs[job_id] = job
+        return job_id
+
+    def submit(self, algorithm, params, X, y, classes, pruner=None, threads=None, export_dir=RUNS_DIR):
+        """Queue a training run and return its job ID.
+
+        The fitted model is exported as a bundle to ``export_dir`` (None
+        skips the export).
+        """
+        return self._submit(algorithm, params, (X, y, classes), pruner, threads, export_dir)
+
+    def submit_cross_validation(self, algorithm, params, folds_dir):
+        """Queue one job per precomputed fold (see datasets.load_cv_folds)"""
+        n_folds = datasets.count_cv_folds(folds_dir)
+        threads = max(self.threads_per_job * self.max_workers // n_folds, 1)
+        cv_id = uuid.uuid4().hex[:12]
+        self._cross_validations[cv_id] = [
+            self._submit(algorithm, params, (folds_dir, fold), threads=threads) for fold in range(n_folds)
+        ]
+        return cv_id
+
+    def cross_validation_status(self, cv_id):
+        """(fold statuses, combined result or None until every fold is done)"""
+        job_ids = self._cross_validations.get(cv_id, [])
+        statuses = [self.status(job_id) for job_id in job_ids]
+        if not statuses or any(status['state'] != "done" for status in statuses):
+            return statuses, None
+        wall_time = (max(self._jobs[j]['finished'] for j in job_ids)
+                     - min(self._jobs[j]['submitted'] for j in job_ids))
+        return statuses, combine_folds([status['result'] for status in statuses], wall_time)
+
+    def submit_sweep(self, algorithm, grid, X, y, classes):
+        """Queue one single-threaded job per grid combination; returns a sweep ID.
+
+        Many small fits side by side use the cores better than one
+        multi-threaded fit after another.
+        """
+        configurations = parameter_grid(grid)
+        if not configurations:
+            raise ValueError("The parameter grid is empty")
+        pruner = MedianPruner(self._manager.dict(), self._manager.Lock())
+        sweep_id = uuid.uuid4().hex[:12]
+        self._sweeps[sweep_id] = [
+            self.submit(algorithm, params, X, y, classes, pruner=pruner, threads=1, export_dir=None)
+            for params in configurations
+        ]
+        return sweep_id
+
+    def sweep_status(self, sweep_id):
+        """(finished, leaderboard) for a sweep, best accuracy first.
+
+        Each leaderboard row holds the trial's state, parameters, accuracy,
+        training time and trees built (fewer than planned when pruned).
+        """
+        rows = []
+        for job_id in self._sweeps.get(sweep_id, []):
+            status = self.status(job_id)
+            result, progress = status['result'], status['progress'] or {}
+            state = status['state']
+            if result is not None and result['pruned_at'] is not None:
+                state = "pruned"
+            rows.append({
+                'job_id': job_id,
+                'state': state,
+                **self._jobs[job_id]['params'],
+                'accuracy': result['accuracy'] if result else progress.get('metric', {}).get('accuracy'),
+                'training_time': result['training_time'] if result else progress.get('elapsed'),
+                'trees': (result['pruned_at'] or progress.get('total')) if result else progress.get('done'),
+            })
+        finished = all(row['state'] in ("done", "pruned", "failed") for row in rows)
+        rows.sort(key=lambda row: (row['accuracy'] is None, -(row['accuracy'] or 0)))
+        return finished, rows
+
+    def status(self, job_id):
+        """State (queued/running/done/failed), progress, result and error of a job"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future = job['future']
+        status = {
+            'job_id': job_id,
+            'algorithm': job['algorithm'],
+            'state': "queued",
+            'progress': self._progress.get(job_id),
+            'result': None,
+            'error': None,
+        }
+        if future.done():
+            error = future.exception()
+            if error is None:
+                status.update(state="done", result=future.result())
+            else:
+                status.update(state="failed", error=f"{type(error).__name__}: {error}")
+        elif status['progress'] is not None:
+            status['state'] = "running"
+        return status
+
+    def active(self):
+        """IDs of jobs that are queued or running"""
+        return [job_id for job_id, job in self._jobs.items() if not job['future'].done()]